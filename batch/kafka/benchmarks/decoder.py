@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# Decoder Benchmark
+#
+# Compare the JSON decoder backends on Kafka message values, including
+# the nested task payload of lib.server.game messages. Record payloads
+# with e.g. `kafka-console-consumer --topic lib.server.game > game.ndjson`
+#
+#   PYTHONPATH=. python benchmarks/decoder.py --input game.ndjson
+#   PYTHONPATH=. python benchmarks/decoder.py --runs 5 --count 50000
+
+from lib.worker.decoder import BACKENDS
+
+import argparse
+import timeit
+import json
+
+# Shaped after the simulator's lib.server.game and lib.server.lobby logs
+SAMPLE_GAME = {
+    'level': 'INFO',
+    'timestamp': '2023-01-01T10:00:00.123456',
+    'name': 'lib.server.game',
+    'log_message': 'Attack Completed',
+    'task': json.dumps({
+        'TIMESTAMP': '2023-01-01T10:00:00Z',
+        'PAYLOAD': {'GAME_TOKEN': '9f1c2e0e-4d1b-4f5a-a3a7-5a0e1b7d6c11', 'USER_TOKEN': '0b6f3f7e-2c6e-4b8e-9a4d-1f2e3d4c5b6a'},
+        'STATUS': {
+            'ACTION': 'Attack',
+            'DETAILS': {
+                'ENEMY_TOKEN': '7c9e6679-7425-40de-944b-e07fc1f90ae7',
+                'ENEMY_DAMAGE': 37,
+                'ENEMY_HEALTH_PRIOR': 410,
+                'ENEMY_HEALTH_POST': 373
+            }
+        }
+    })
+}
+
+SAMPLE_LOBBY = {
+    'level': 'INFO',
+    'timestamp': '2023-01-01T10:00:00.123456',
+    'name': 'lib.server.lobby',
+    'log_message': 'Starting Match',
+    'task': {
+        'TIMESTAMP': '2023-01-01T10:00:00Z',
+        'PAYLOAD': {
+            'GAME_TOKEN': '9f1c2e0e-4d1b-4f5a-a3a7-5a0e1b7d6c11',
+            'PARTICIPANTS_HEROS': {
+                '0b6f3f7e-2c6e-4b8e-9a4d-1f2e3d4c5b6a': {'id': 70, 'attack': 55, 'health': 420},
+                '7c9e6679-7425-40de-944b-e07fc1f90ae7': {'id': 644, 'attack': 61, 'health': 410}
+            }
+        }
+    }
+}
+
+def load_values(path, count):
+    if path:
+        with open(path, 'rb') as f:
+            return [line.strip() for line in f if line.strip()]
+
+    return [json.dumps(SAMPLE_GAME if i % 2 else SAMPLE_LOBBY).encode('utf8') for i in range(count)]
+
+def decode_all(loads, values):
+    for value in values:
+        log = loads(value)
+        if isinstance(log['task'], str):
+            loads(log['task'])
+
+def main():
+    parser = argparse.ArgumentParser(description='Kafka message decoder benchmark')
+    parser.add_argument('--input', help='file of recorded message values, one per line')
+    parser.add_argument('--count', type=int, default=20000, help='sample messages when no input is given')
+    parser.add_argument('--runs', type=int, default=3, help='repetitions, the best is reported')
+    args = parser.parse_args()
+
+    values = load_values(args.input, args.count)
+    print('%-8s %12s %12s' % ('backend', 'best s', 'msgs/s'))
+    for name, backend in BACKENDS.items():
+        try:
+            loads = backend()
+        except ImportError:
+            print('%-8s %12s' % (name, 'unavailable'))
+            continue
+
+        best = min(timeit.repeat(lambda: decode_all(loads, values), number=1, repeat=args.runs))
+        print('%-8s %12.4f %12.0f' % (name, best, len(values) / best))
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,14 @@
 #https://github.com/aio-libs/aiokafka/blob/master/examples/local_state_consumer.py
 
+from lib.utils.kafka.policy import Batch_Policy, caught_up
 from lib.utils.kafka import rebalance
-from collections import Counter
 from functools import wraps
 
 import aiokafka
 import asyncio
 import logging
 import kafka
+import copy
 import sys
 import os
 
@@ -16,37 +17,28 @@ KAFKA_HOST=os.getenv('KAFKA_HOST', 'localhost')
 KAFKA_PORT=int(os.getenv('KAFKA_PORT', 9093))
 WORKER_CHANNEL=os.getenv('WORKER_CHANNEL', 'lib.server.game')
 BATCH_CONTINUOUS=eval(os.getenv('BATCH_CONTINUOUS', 'True'))
-BATCH_SIZE=int(os.getenv('BATCH_SIZE', 1000))
+FLUSH_MAX_IN_FLIGHT=int(os.getenv('FLUSH_MAX_IN_FLIGHT', 2))
 
 # Setup
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 KAFKA_URL = '%s:%d' % (KAFKA_HOST, KAFKA_PORT)
 
 class Kafka_Subscriber(object):
+    """Kafka Subscriber
 
-    @property
-    def etl_func(self):
-        return
-    
-    @etl_func.setter
-    def etl_func(self, func):
-        self._etl_func = func
-    
-    @property
-    def start_func(self):
-        return
-    
-    @start_func.setter
-    def start_func(self, func):
-        self._start_func = func
-    
-    @property
-    def end_func(self):
-        return
-    
-    @end_func.setter
-    def end_func(self, func):
-        self._end_func = func
+    Consumes WORKER_CHANNEL, hands every fetch to a Partition_Pool and
+    commits each partition's offsets once its batch is published.
+
+    Args:
+        pool: Partition_Pool running the ETL clients
+        policy: Batch_Policy copied for every partition
+    """
+
+    def __init__(self, pool, policy=None):
+        self.pool = pool
+        self.policy = policy or Batch_Policy()
+        self.policies = {}
+        self._flushes = set()
 
     async def connect(self):
         try:
@@ -67,21 +59,74 @@ class Kafka_Subscriber(object):
             await asyncio.sleep(1)
             pass
 
+    def _policy(self, tp):
+        if tp not in self.policies:
+            self.policies[tp] = copy.copy(self.policy)
+            self.policies[tp].reset()
+
+        return self.policies[tp]
+
+    def _timeout_ms(self):
+        return min([p.timeout_ms() for p in self.policies.values()] or [self.policy.timeout_ms()])
+
+    def _due(self, msg_set):
+        """Due Partitions
+
+        Partitions whose batch is closed after a fetch. Each
+        partition has its own policy, so it flushes at its own size and
+        offset boundaries, independently of the others.
+
+        Args:
+            msg_set: result of consumer.getmany
+        """
+        return [
+            tp for tp, policy in self.policies.items()
+            if policy.records and (not BATCH_CONTINUOUS or policy.due(caught_up(self.connection, {tp: msg_set.get(tp)})))
+        ]
+
+    async def _end(self, tps=None):
+        """End Batch
+
+        Close the batch of each partition on the pool. Every partition
+        is flushed in the background while consumption continues, and
+        its offsets are committed once its batch has published. A
+        partition that buffered no tasks carries over into its next
+        batch and nothing is committed. Once FLUSH_MAX_IN_FLIGHT flushes
+        are pending, wait for the oldest to complete before reading more
+        messages.
+
+        Args:
+            tps: partitions to close, every assigned one when None
+        """
+        self._flushes.add(asyncio.gather(*[
+            self.topic_state.commit(flush, self.topic_state.checkpoint([tp]))
+            for tp, flush in self.pool.end(tps).items()
+        ]))
+
+        await self._wait_flushes(FLUSH_MAX_IN_FLIGHT)
+
+    async def _wait_flushes(self, limit):
+        for flush in [f for f in self._flushes if f.done()]:
+            self._flushes.discard(flush)
+            flush.result()
+
+        while len(self._flushes) > limit:
+            done, self._flushes = await asyncio.wait(self._flushes, return_when=asyncio.FIRST_COMPLETED)
+            for flush in done:
+                flush.result()
+
     async def run(self, runs=0):
         # Configure State Management
         await self.connection.start()
 
-        topic_state = rebalance.RedisState()
-        listener = rebalance.RebalanceListener(self.connection, topic_state)
+        topic_state = self.topic_state = rebalance.RedisState()
+        listener = rebalance.RebalanceListener(self.connection, topic_state, self.pool)
         self.connection.subscribe(topics=[WORKER_CHANNEL], listener=listener)
 
-        save_task = asyncio.create_task(rebalance.save_state_every_second(topic_state))
-
         try:
-            self._start_func()
             while BATCH_CONTINUOUS or runs==0:
                 try:
-                    msg_set = await self.connection.getmany(timeout_ms=1000)
+                    msg_set = await self.connection.getmany(timeout_ms=self._timeout_ms())
                 except aiokafka.errors.OffsetOutOfRangeError as err:
                     # This means that saved file is outdated and should be
                     # discarded
@@ -95,20 +140,23 @@ class Kafka_Subscriber(object):
                     await self.connection.seek_to_beginning(tps)
                     continue
 
+                fresh = {tp: topic_state.fresh(tp, msgs) for tp, msgs in msg_set.items() if msgs}
+                await self.pool.extract_transform(fresh)
+
                 for tp, msgs in msg_set.items():
-                    for msg in msgs:
-                        self._etl_func(msg)
-                        topic_state.add_counts(tp, 1, msg.offset)
-
-                    await asyncio.sleep(1)
-                    if not BATCH_CONTINUOUS or topic_state._run_counts[tp][tp.partition] > BATCH_SIZE:
-                        self._end_func()
-                        topic_state._run_counts[tp] = Counter({tp.partition: 0})
-                        self._start_func()
+                    if msgs:
+                        topic_state.add_counts(tp, len(fresh[tp]), msgs[-1].offset)
+                        self._policy(tp).add(fresh[tp])
+
+                due = self._due(msg_set)
+                if due:
+                    await self._end(due)
+                    for tp in due:
+                        self.policies[tp].reset()
                 
                 runs+=1
 
         finally:
+            await self._wait_flushes(0)
             await self.connection.stop()
-            save_task.cancel()
-            await save_task
\ No newline at end of file
+            self.pool.shutdown()
\ No newline at end of file
@@ -1,3 +1,4 @@
+import redis.asyncio
 import logging
 import redis
 import json
@@ -9,6 +10,8 @@ WORKER_CHANNEL=os.getenv('WORKER_CHANNEL', 'lib.server.lobby')
 REDIS_HOST=os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT=int(os.getenv('REDIS_PORT', '6379'))
 REDIS_DB=os.getenv('REDIS_DB', 0)
+REDIS_MAX_CONNECTIONS=int(os.getenv('REDIS_MAX_CONNECTIONS', 8))
+REDIS_POOL_TIMEOUT=int(os.getenv('REDIS_POOL_TIMEOUT', 5))
 
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 
@@ -16,6 +19,17 @@ logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 R_POOL = redis.ConnectionPool(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB)
 R_CONN = redis.Redis(connection_pool=R_POOL, decode_responses=True)
 
+# Shared by every coroutine of the worker, so Redis I/O never blocks the
+# event loop. The pool is bounded; callers wait for a free connection
+# rather than opening more.
+AR_POOL = redis.asyncio.BlockingConnectionPool(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=REDIS_DB,
+    max_connections=REDIS_MAX_CONNECTIONS,
+    timeout=REDIS_POOL_TIMEOUT)
+AR_CONN = redis.asyncio.Redis(connection_pool=AR_POOL)
+
 class Redis_Subscriber:
 
     @property
@@ -27,9 +41,9 @@ class Redis_Subscriber:
         self._callback_function = callback_function
     
     async def run(self):
-        sub = R_CONN.pubsub()
-        sub.subscribe(WORKER_CHANNEL)
-        for msg in sub.listen():
+        sub = AR_CONN.pubsub()
+        await sub.subscribe(WORKER_CHANNEL)
+        async for msg in sub.listen():
             if isinstance(msg['data'], bytes):
                 msg = json.loads(msg['data'].decode('utf8'))
                 await self._callback_function()
\ No newline at end of file
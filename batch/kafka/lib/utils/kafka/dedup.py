@@ -0,0 +1,71 @@
+import os
+
+# Environment Variables
+DEDUP=eval(os.getenv('DEDUP', 'True'))
+DEDUP_WINDOW=int(os.getenv('DEDUP_WINDOW', 1 << 20))
+
+class Offset_Filter:
+    """Offset Filter
+
+    Drops messages of one partition that were already ingested, in
+    bounded memory. Offsets up to the high water mark belong to
+    committed batches. Offsets above it that are buffered or being
+    flushed are marked in a bitmap of `window` bits starting at the
+    high water mark, which slides forward as batches are committed.
+    Offsets beyond the window are let through unmarked.
+
+    Args:
+        high_water: last committed offset, -1 when none
+        window: offsets tracked above the high water mark
+    """
+
+    def __init__(self, high_water=-1, window=DEDUP_WINDOW):
+        self.high_water = high_water
+        self.base = (high_water + 1) & ~7
+        self.bits = bytearray((window + 7) // 8)
+
+    def filter(self, msgs):
+        """Filter Messages
+
+        Return the messages not ingested yet, and mark them.
+
+        Args:
+            msgs: Kafka ConsumerRecords of the partition, in offset order
+        """
+        if msgs and msgs[-1].offset <= self.high_water:
+            return []
+
+        bits, base, size = self.bits, self.base, len(self.bits) << 3
+        fresh = []
+        for msg in msgs:
+            offset = msg.offset
+            if offset <= self.high_water:
+                continue
+
+            i = offset - base
+            if i < size:
+                mask = 1 << (i & 7)
+                if bits[i >> 3] & mask:
+                    continue
+                bits[i >> 3] |= mask
+
+            fresh.append(msg)
+
+        return fresh
+
+    def advance(self, high_water):
+        """Advance High Water Mark
+
+        Args:
+            high_water: last offset of a committed batch
+        """
+        if high_water <= self.high_water:
+            return
+
+        self.high_water = high_water
+        base = (high_water + 1) & ~7
+        shift = min((base - self.base) >> 3, len(self.bits))
+        if shift:
+            del self.bits[:shift]
+            self.bits.extend(bytes(shift))
+        self.base = base
@@ -0,0 +1,60 @@
+from lib.pubsub.redis import AR_CONN
+
+import json
+
+# Manifests fetched per index page while scanning for a range
+PAGE_SIZE=16
+
+def index_key(topic, partition):
+    return 'kafka.topic.%s.partition.%d.batches' % (topic, partition)
+
+def manifest_key(batch_id):
+    return 'kafka.batch.%s.manifest' % batch_id
+
+def index(pipe, manifest):
+    """Index Batch
+
+    Add a committed batch to the index of every partition it covers. A
+    partition's index is a sorted set of batch ids scored by the last
+    offset of the batch.
+
+    Args:
+        pipe: Redis pipeline of the commit
+        manifest: batch manifest
+    """
+    for key, (_, last) in manifest.get('partitions', {}).items():
+        topic, partition = key.rsplit(':', 1)
+        pipe.zadd(index_key(topic, int(partition)), {manifest['batch_id']: last})
+
+async def find_batches(topic, partition, first, last=None):
+    """Find Batches
+
+    Manifests of the batches holding offsets `first` to `last` of a
+    partition, in offset order. The index is searched from the first
+    batch ending at or after `first`, and scanning stops at the first
+    batch starting past `last`.
+
+    Args:
+        topic: Kafka topic
+        partition: partition number
+        first: first offset
+        last: last offset, `first` when None
+    """
+    last = first if last is None else last
+    key = '%s:%d' % (topic, partition)
+    manifests, start = [], 0
+    while True:
+        batch_ids = await AR_CONN.zrangebyscore(index_key(topic, partition), first, '+inf', start=start, num=PAGE_SIZE)
+        if not batch_ids:
+            return manifests
+
+        for value in await AR_CONN.mget([manifest_key(b.decode('utf8')) for b in batch_ids]):
+            if value is None:
+                continue
+
+            manifest = json.loads(value)
+            if manifest['partitions'][key][0] > last:
+                return manifests
+            manifests.append(manifest)
+
+        start += PAGE_SIZE
@@ -0,0 +1,94 @@
+import time
+import os
+
+# Environment Variables
+BATCH_SIZE=int(os.getenv('BATCH_SIZE', 1000))
+BATCH_MAX_BYTES=int(os.getenv('BATCH_MAX_BYTES', 16 << 20))
+BATCH_MAX_LATENCY=float(os.getenv('BATCH_MAX_LATENCY', 60))
+BATCH_END_OF_LOG=eval(os.getenv('BATCH_END_OF_LOG', 'False'))
+BATCH_FETCH_TIMEOUT=int(os.getenv('BATCH_FETCH_TIMEOUT', 1000))
+
+class Batch_Policy:
+    """Batch Policy
+
+    Decides when the buffered messages of a subscriber are flushed. With
+    a partition pool the subscriber copies the policy per partition, so
+    every partition's batch is bounded on its own. A
+    batch is due once it holds `max_records` messages or `max_bytes` of
+    serialized keys and values, once its first message is `max_latency`
+    seconds old, or - with `end_of_log` - once every fetched partition
+    has caught up with its high watermark.
+
+    Args:
+        max_records: messages per batch
+        max_bytes: serialized bytes per batch
+        max_latency: seconds between the first message and the flush
+        end_of_log: flush whenever the consumer has caught up
+    """
+
+    def __init__(self, max_records=BATCH_SIZE, max_bytes=BATCH_MAX_BYTES, max_latency=BATCH_MAX_LATENCY, end_of_log=BATCH_END_OF_LOG):
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.max_latency = max_latency
+        self.end_of_log = end_of_log
+        self.reset()
+
+    def reset(self):
+        self.records = 0
+        self.bytes = 0
+        self.opened = None
+
+    def add(self, msgs):
+        if not msgs:
+            return
+
+        if self.opened is None:
+            self.opened = time.monotonic()
+
+        self.records += len(msgs)
+        self.bytes += sum(max(m.serialized_key_size, 0) + max(m.serialized_value_size, 0) for m in msgs)
+
+    def timeout_ms(self):
+        """Fetch Timeout
+
+        Milliseconds the next fetch may block without overshooting the
+        latency bound of the open batch.
+        """
+        if self.opened is None:
+            return BATCH_FETCH_TIMEOUT
+
+        remaining = self.max_latency - (time.monotonic() - self.opened)
+        return max(0, min(BATCH_FETCH_TIMEOUT, int(remaining * 1000)))
+
+    def due(self, caught_up=False):
+        """Batch Due
+
+        Args:
+            caught_up: the last fetch reached the end of every partition
+        """
+        if self.records == 0:
+            return False
+
+        return (
+            self.records >= self.max_records or
+            self.bytes >= self.max_bytes or
+            time.monotonic() - self.opened >= self.max_latency or
+            (self.end_of_log and caught_up)
+        )
+
+def caught_up(consumer, msg_set):
+    """Caught Up
+
+    True when a fetch came back empty, or every partition it returned
+    ends at the partition's high watermark.
+
+    Args:
+        consumer: aiokafka consumer
+        msg_set: result of consumer.getmany
+    """
+    for tp, msgs in msg_set.items():
+        highwater = consumer.highwater(tp)
+        if msgs and (highwater is None or msgs[-1].offset + 1 < highwater):
+            return False
+
+    return True
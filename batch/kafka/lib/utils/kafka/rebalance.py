@@ -2,8 +2,10 @@
 
 from aiokafka.errors import OffsetOutOfRangeError
 from aiokafka import ConsumerRebalanceListener
-from lib.pubsub.redis import R_CONN
-from collections import Counter
+from lib.pubsub.redis import AR_CONN
+from lib.utils.kafka.dedup import DEDUP, Offset_Filter
+from lib.utils.kafka import lineage
+from array import array
 
 import asyncio
 import logging
@@ -13,19 +15,30 @@ import sys
 # Setup
 logging.basicConfig(stream=sys.stdout, level=logging.INFO)
 
+def _count(value, tp):
+    # Counts were stored as a JSON {partition: count} object before they
+    # were stored as plain integers
+    if value.startswith(b'{'):
+        return int(json.loads(value.decode('utf8')).get(str(tp.partition), 0))
+
+    return int(value)
+
 class RebalanceListener(ConsumerRebalanceListener):
 
-    def __init__(self, consumer, topic_state):
+    def __init__(self, consumer, topic_state, pool):
         self.consumer = consumer
         self.topic_state = topic_state
+        self.pool = pool
 
     async def on_partitions_revoked(self, revoked):
         logging.info('Revoked {}'.format(revoked))
-        self.topic_state.dump_state(revoked=True)
+        await self.topic_state.drain()
+        self.pool.revoke(revoked)
 
     async def on_partitions_assigned(self, assigned):
         logging.info('Assigned {}'.format(assigned))
-        self.topic_state.load_state(assigned)
+        await self.topic_state.load_state(assigned)
+        self.pool.assign(assigned)
         for tp in assigned:
             last_offset = self.topic_state.get_last_offset(tp)
             if last_offset < 0:
@@ -35,49 +48,177 @@ class RebalanceListener(ConsumerRebalanceListener):
 
 
 class RedisState:
+    """Redis State
+
+    Offsets and counts of the assigned partitions. Offsets only advance
+    in Redis once the batch that consumed them has been published: each
+    commit writes the offsets, counts and batch manifest in a single
+    MULTI transaction, in batch order. Restarting or rebalancing resumes
+    after the last committed batch.
+
+    Every assigned partition gets a slot in flat integer arrays holding
+    its last consumed offset, committed count, count of the open batch
+    and last committed offset, so the per-fetch bookkeeping is a dict
+    lookup and two array stores. Counts are stored in Redis as plain
+    integers.
+
+    With DEDUP, each partition also keeps an Offset_Filter and a
+    `state.high_water` key, the highest offset ever committed. The key
+    is not lowered when the state is discarded and the partition is read
+    again from the beginning, so replayed messages are dropped before
+    they reach the ETL clients.
+    """
 
     def __init__(self):
-        self._counts = {}
-        self._offsets = {}
-        self._run_counts = {}
-
-    def dump_state(self, revoked=False):
-        for tp in self._counts:
-            if not revoked:
-                self._counts[tp] += self._run_counts[tp]
-            
-            R_CONN.set('kafka.topic.%s.partition.%d.state.last_offset' % (tp.topic, tp.partition), self._offsets[tp])
-            R_CONN.set('kafka.topic.%s.partition.%d.state.counts' % (tp.topic, tp.partition), json.dumps(dict(self._counts[tp])))
-
-    def load_state(self, partitions):
-        self._counts.clear()
-        self._offsets.clear()
-        for tp in partitions:
-            offset = R_CONN.get('kafka.topic.%s.partition.%d.state.last_offset' % (tp.topic, tp.partition))
-            counts = R_CONN.get('kafka.topic.%s.partition.%d.state.counts' % (tp.topic, tp.partition))
-
-            self._offsets[tp] = int(offset.decode('utf8')) if offset else -1
-            self._counts[tp] = Counter(json.loads(counts.decode('utf8'))) if counts else Counter({tp.partition: 0})
-            if tp not in self._run_counts or not self._run_counts[tp]:
-                self._run_counts[tp] = Counter({tp.partition: 0})
+        self._slots = {}
+        self._offsets = array('q')
+        self._counts = array('q')
+        self._run_counts = array('q')
+        self._saved = array('q')
+        self._filters = []
+        self._last_commit = None
+
+    def _keys(self, tp):
+        return (
+            'kafka.topic.%s.partition.%d.state.last_offset' % (tp.topic, tp.partition),
+            'kafka.topic.%s.partition.%d.state.counts' % (tp.topic, tp.partition),
+            'kafka.topic.%s.partition.%d.state.high_water' % (tp.topic, tp.partition))
+
+    def fresh(self, tp, msgs):
+        """Fresh Messages
+
+        Messages of a fetch that were not ingested yet.
+
+        Args:
+            tp: TopicPartition of the messages
+            msgs: Kafka ConsumerRecords, in offset order
+        """
+        if not DEDUP or tp not in self._slots:
+            return msgs
+
+        return self._filters[self._slots[tp]].filter(msgs)
+
+    def checkpoint(self, tps=None):
+        """Checkpoint
+
+        Close the current batch, returning the offsets and message counts
+        it covers.
+
+        Args:
+            tps: partitions of the batch, all assigned when None
+        """
+        checkpoint = {}
+        for tp in (self._slots if tps is None else tps):
+            i = self._slots[tp]
+            checkpoint[tp] = (self._offsets[i], self._run_counts[i])
+            self._run_counts[i] = 0
+
+        return checkpoint
+
+    def commit(self, flush, checkpoint):
+        """Commit Batch
+
+        Args:
+            flush: awaitable resolving to the batch manifest once its
+                files are published, or to None when the batch carries
+                over and nothing is committed
+            checkpoint: offsets and counts of the batch
+
+        Returns:
+            asyncio future resolving once the batch is committed
+        """
+        previous = self._last_commit
+        self._last_commit = asyncio.ensure_future(self._commit(flush, checkpoint, previous))
+        return self._last_commit
+
+    async def _commit(self, flush, checkpoint, previous):
+        manifest = await flush
+
+        # Every commit, including a carry over, waits for the previous
+        # one, so the last commit only completes once all have
+        if previous is not None:
+            await previous
+
+        if manifest is None:
+            for tp, (_, counts) in checkpoint.items():
+                if tp in self._slots:
+                    self._run_counts[self._slots[tp]] += counts
+            return None
+
+        async with AR_CONN.pipeline(transaction=True) as pipe:
+            for tp, (offset, counts) in checkpoint.items():
+                i = self._slots[tp]
+                self._counts[i] += counts
+                if self._saved[i] == offset and counts == 0:
+                    continue
+
+                offset_key, counts_key, high_water_key = self._keys(tp)
+                pipe.set(offset_key, offset)
+                pipe.set(counts_key, self._counts[i])
+                pipe.set(high_water_key, max(offset, self._filters[i].high_water))
+
+            if isinstance(manifest, dict):
+                manifest = dict(manifest, offsets={'%s:%d' % (tp.topic, tp.partition): offset for tp, (offset, _) in checkpoint.items()})
+                pipe.set(lineage.manifest_key(manifest['batch_id']), json.dumps(manifest))
+                lineage.index(pipe, manifest)
+                for topic in set(tp.topic for tp in checkpoint):
+                    pipe.set('kafka.topic.%s.state.last_batch' % topic, manifest['batch_id'])
+
+            await pipe.execute()
+
+        for tp, (offset, _) in checkpoint.items():
+            self._saved[self._slots[tp]] = offset
+            self._filters[self._slots[tp]].advance(offset)
+
+        return manifest
+
+    async def drain(self):
+        """Drain Commits
+
+        Wait for every pending commit, e.g. before partitions are
+        revoked. Commits are chained, so waiting for the last suffices.
+        """
+        if self._last_commit is not None:
+            await asyncio.wait([self._last_commit])
+
+    async def load_state(self, partitions):
+        """Load State
+
+        Lay out a slot per assigned partition and load its committed
+        offset, count and high water mark. Uncommitted counts and
+        filtered offsets are dropped with the previous assignment, since
+        its messages are consumed again.
+
+        Args:
+            partitions: assigned TopicPartitions
+        """
+        partitions = list(partitions)
+        values = await AR_CONN.mget([key for tp in partitions for key in self._keys(tp)]) if partitions else []
+
+        self._slots = {tp: i for i, tp in enumerate(partitions)}
+        self._offsets = array('q', [-1] * len(partitions))
+        self._counts = array('q', [0] * len(partitions))
+        self._run_counts = array('q', [0] * len(partitions))
+        self._filters = []
+        for i, tp in enumerate(partitions):
+            offset, counts, high_water = values[3 * i:3 * i + 3]
+            if offset:
+                self._offsets[i] = int(offset)
+            if counts:
+                self._counts[i] = _count(counts, tp)
+            self._filters.append(Offset_Filter(max(int(high_water) if high_water else -1, self._offsets[i])))
+        self._saved = array('q', self._offsets)
 
     def add_counts(self, tp, counts, last_offset):
-        self._run_counts[tp][tp.partition] += counts
-        self._offsets[tp] = last_offset
+        i = self._slots[tp]
+        self._run_counts[i] += counts
+        self._offsets[i] = last_offset
 
     def get_last_offset(self, tp):
-        return self._offsets[tp]
+        return self._offsets[self._slots[tp]]
 
     def discard_state(self, tps):
         for tp in tps:
-            self._offsets[tp] = -1
-            self._counts[tp] = Counter({tp.partition: 0})
-
-
-async def save_state_every_second(topic_state):
-    while True:
-        try:
-            await asyncio.sleep(1)
-        except asyncio.CancelledError:
-            break
-        topic_state.dump_state()
\ No newline at end of file
+            i = self._slots[tp]
+            self._offsets[i] = -1
+            self._counts[i] = 0
@@ -6,14 +6,20 @@
 # Websocket History & Areas of Improvement
 # https://ably.com/topic/websockets
 
+import sys
+import os
+
+# The shared standardizer package sits next to the worker in the
+# repository, and at the image's root once built
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', '..', 'serverless_functions'))
+
 from lib.worker.parser import ETL_Lib_Server_Game, ETL_Lib_Server_Lobby
+from lib.worker.pool import Partition_Pool
 from lib.pubsub.kafka import Kafka_Subscriber
 from lib.pubsub.redis import R_CONN
 
 import importlib
-import datetime
 import logging
-import os
 
 # Enviornment Variables
 REDIS_EXPIRY=int(os.getenv('REDIS_EXPIRY', 30))
@@ -27,63 +33,6 @@ logger_module = importlib.import_module('lib.utils.loggers', LOGGER_MODULE)
 QUEUE='worker.%s' % __name__
 logger=logging.getLogger('%s.%s' % (LOGGER_MODULE, QUEUE))
 
-client_lib_server_lobby = ETL_Lib_Server_Lobby()
-client_lib_server_game = ETL_Lib_Server_Game()
-
-def lib_server_lobby_start():
-    logging.info('Starting lib.server.lobby ETL')
-    client_lib_server_lobby.start_time = datetime.datetime.now()
-
-def lib_server_lobby_end():
-    logging.info('Completed lib.server.lobby ETL')
-    client_lib_server_lobby.end_time = datetime.datetime.now()
-    if len(client_lib_server_lobby.tasks) > 0:
-        _lib_server_lobby_load()
-        client_lib_server_lobby.clean()
-
-def lib_server_lobby_extract_transform(msg):
-    logger.info('Running lib.server.lobby Routine')
-
-    msg, log, task = client_lib_server_lobby.extract(msg)
-    client_lib_server_lobby.generate_msg_id()
-    client_lib_server_lobby.transform_buffer(msg)
-    client_lib_server_lobby.transform_log(log)
-    client_lib_server_lobby.transform(log, task)
-
-def _lib_server_lobby_load():
-    client_lib_server_lobby.transform_etl()
-    client_lib_server_lobby.load_json(client_lib_server_lobby.etl, 'etl_meta')
-    client_lib_server_lobby.load_json(client_lib_server_lobby.buffers, 'buffer_meta')
-    client_lib_server_lobby.load_json(client_lib_server_lobby.logs, 'log_meta')
-    client_lib_server_lobby.load_json(client_lib_server_lobby.tasks, 'lib_server_lobby')
-
-def lib_server_game_start():
-    logging.info('Starting lib.server.game ETL')
-    client_lib_server_game.start_time = datetime.datetime.now()
-
-def lib_server_game_end():
-    logging.info('Completed lib.server.game ETL')
-    client_lib_server_game.end_time = datetime.datetime.now()
-    if len(client_lib_server_game.tasks) > 0:
-        _lib_server_game_load()
-        client_lib_server_game.clean()
-
-def lib_server_game_extract_transform(msg):
-    logger.info('Running lib.server.game Routine')
-
-    msg, log, task = client_lib_server_game.extract(msg)
-    client_lib_server_game.generate_msg_id()
-    client_lib_server_game.transform_buffer(msg)
-    client_lib_server_game.transform_log(log)
-    client_lib_server_game.transform(log, task)
-
-def _lib_server_game_load():
-    client_lib_server_game.transform_etl()
-    client_lib_server_game.load_json(client_lib_server_game.etl, 'etl_meta')
-    client_lib_server_game.load_json(client_lib_server_game.buffers, 'buffer_meta')
-    client_lib_server_game.load_json(client_lib_server_game.logs, 'log_meta')
-    client_lib_server_game.load_json(client_lib_server_game.tasks, 'lib_server_game')
-    
 def clean(msg, host):
     if msg['log_message'] == 'Cleaning Game Records':
         host = R_CONN.get('games:%s:host' % msg['task']['GAME_TOKEN'])
@@ -103,17 +52,11 @@ def clean(msg, host):
                 R_CONN.lrem('games:%s:logs' % msg['task']['GAME_TOKEN'])
 
 async def sub_lib_server_game():
-    subscriber = Kafka_Subscriber()
-    subscriber.start_func = lib_server_game_start
-    subscriber.end_func = lib_server_game_end
-    subscriber.etl_func = lib_server_game_extract_transform
+    subscriber = Kafka_Subscriber(Partition_Pool(ETL_Lib_Server_Game))
     await subscriber.connect()
     await subscriber.run()
 
 async def sub_lib_server_lobby():
-    subscriber = Kafka_Subscriber()
-    subscriber.start_func = lib_server_lobby_start
-    subscriber.end_func = lib_server_lobby_end
-    subscriber.etl_func = lib_server_lobby_extract_transform
+    subscriber = Kafka_Subscriber(Partition_Pool(ETL_Lib_Server_Lobby))
     await subscriber.connect()
     await subscriber.run()
\ No newline at end of file
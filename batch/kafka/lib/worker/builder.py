@@ -0,0 +1,133 @@
+from array import array
+
+import pyarrow as pa
+
+def _typecode(itemsize, signed):
+    for code in ('bhilq' if signed else 'BHILQ'):
+        if array(code).itemsize == itemsize:
+            return code
+
+# Fixed width columns are accumulated in typed arrays and handed to
+# pyarrow without copying. Everything else falls back to a list.
+TYPECODES = {
+    pa.int8(): _typecode(1, True),
+    pa.int16(): _typecode(2, True),
+    pa.int32(): _typecode(4, True),
+    pa.int64(): _typecode(8, True),
+    pa.uint8(): _typecode(1, False),
+    pa.uint16(): _typecode(2, False),
+    pa.uint32(): _typecode(4, False),
+    pa.uint64(): _typecode(8, False),
+}
+
+class Column_Builder:
+    """Column Builder
+
+    Append-only accumulator for a single schema field.
+    """
+
+    def __init__(self, field):
+        self.field = field
+        self.reset()
+
+    def __len__(self):
+        return len(self._values)
+
+    def reset(self):
+        typecode = TYPECODES.get(self.field.type)
+        self._values = array(typecode) if typecode else []
+        self._nulls = []
+
+    def append(self, value):
+        if value is None and isinstance(self._values, array):
+            self._nulls.append(len(self._values))
+            value = 0
+
+        self._values.append(value)
+
+    def truncate(self, length):
+        del self._values[length:]
+        while self._nulls and self._nulls[-1] >= length:
+            self._nulls.pop()
+
+    def flush(self):
+        """Flush Column
+
+        Hand over the accumulated values as a pyarrow Array and start
+        a new column.
+        """
+        values, nulls = self._values, self._nulls
+        self.reset()
+
+        if not isinstance(values, array):
+            return pa.array(values, type=self.field.type)
+
+        validity = None
+        if nulls:
+            bitmap = bytearray(b'\xff' * ((len(values) + 7) // 8))
+            for i in nulls:
+                bitmap[i >> 3] &= ~(1 << (i & 7)) & 0xff
+            validity = pa.py_buffer(bitmap)
+
+        return pa.Array.from_buffers(
+            self.field.type,
+            len(values),
+            [validity, pa.py_buffer(values)],
+            null_count=len(nulls))
+
+class Batch_Builder:
+    """Batch Builder
+
+    Columnar replacement for a list of per-message dicts. Rows are
+    appended positionally in schema order and flushed as a single
+    pyarrow RecordBatch.
+    """
+
+    def __init__(self, schema):
+        self.schema = schema
+        self._columns = [Column_Builder(f) for f in schema]
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def append(self, *values):
+        """Append Row
+
+        Args:
+            values: one value per schema field, in schema order
+        """
+        if len(values) != len(self._columns):
+            raise ValueError('Expected %d values, received %d' % (len(self._columns), len(values)))
+
+        rows = len(self)
+        try:
+            for column, value in zip(self._columns, values):
+                column.append(value)
+        except (TypeError, OverflowError):
+            self.truncate(rows)
+            raise
+
+    def truncate(self, length):
+        """Truncate Batch
+
+        Drop the rows appended after the first `length`.
+
+        Args:
+            length: rows to keep
+        """
+        for column in self._columns:
+            column.truncate(length)
+
+    def flush(self):
+        """Flush Batch
+
+        Hand over the accumulated rows as a pyarrow RecordBatch and
+        start a new batch.
+        """
+        return pa.RecordBatch.from_arrays(
+            [c.flush() for c in self._columns],
+            schema=self.schema)
+
+    def clear(self):
+        for column in self._columns:
+            column.reset()
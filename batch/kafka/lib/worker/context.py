@@ -0,0 +1,137 @@
+from lib.worker.schema import SCHEMA_RAW_ETL_META, SCHEMA_RAW_BUFFER_META, SCHEMA_RAW_LOG_META
+from lib.worker.schema import SCHEMA_RAW_DEAD_LETTER
+from lib.worker.builder import Batch_Builder
+
+import datetime
+import uuid
+
+class Batch_Context:
+    """Batch Context
+
+    State of one ETL batch: its id, the buffered datasets, its start and
+    end time, and a few metrics. An ETL client fills one context at a
+    time and swaps in a fresh one when the batch closes, so the closed
+    context can be converted and written while the next one fills.
+
+    Args:
+        schema: pyarrow schema of the client's task dataset
+        dataset: name of the client's task dataset
+    """
+
+    def __init__(self, schema, dataset):
+        self.dataset = dataset
+        self.etl = Batch_Builder(SCHEMA_RAW_ETL_META)
+        self.buffers = Batch_Builder(SCHEMA_RAW_BUFFER_META)
+        self.logs = Batch_Builder(SCHEMA_RAW_LOG_META)
+        self.tasks = Batch_Builder(schema)
+        self.dead_letters = Batch_Builder(SCHEMA_RAW_DEAD_LETTER)
+        self.reset()
+
+    def reset(self):
+        """Reset Context
+
+        Drop the buffered rows and open a new batch under a new id.
+        """
+        self.etl.clear()
+        self.buffers.clear()
+        self.logs.clear()
+        self.tasks.clear()
+        self.dead_letters.clear()
+        self.etl_id = str(uuid.uuid4())
+        self.start_time = datetime.datetime.now()
+        self.end_time = None
+        self.messages = 0
+        self.filtered = 0
+        self.topic = None
+        self.offsets = {}
+
+    def track(self, msgs):
+        """Track Messages
+
+        Count a fetch of one partition into the batch and extend the
+        batch's offset range of that partition.
+
+        Args:
+            msgs: Kafka ConsumerRecords of one partition, in offset order
+        """
+        self.messages += len(msgs)
+        first, last = msgs[0], msgs[-1]
+        self.topic = first.topic
+        if first.partition in self.offsets:
+            self.offsets[first.partition][1] = last.offset
+        else:
+            self.offsets[first.partition] = [first.offset, last.offset]
+
+    def mark(self):
+        """Mark Rows
+
+        Row counts of the message datasets, to roll a message back to.
+        """
+        return len(self.buffers), len(self.logs), len(self.tasks)
+
+    def rollback(self, mark):
+        """Roll Back
+
+        Drop the rows appended since a mark, so a message that fails
+        part way leaves no buffer, log or task rows behind.
+
+        Args:
+            mark: row counts returned by mark
+        """
+        for builder, length in zip((self.buffers, self.logs, self.tasks), mark):
+            builder.truncate(length)
+
+    def tag(self):
+        """File Tag
+
+        `p<partition>_<first>-<last>` offset range of a single partition
+        batch, or None when the batch spans several partitions.
+        """
+        if len(self.offsets) == 1:
+            for partition, (first, last) in self.offsets.items():
+                return 'p%d_%d-%d' % (partition, first, last)
+
+    def metrics(self):
+        """Batch Metrics
+
+        Counts of the batch, reported alongside its manifest.
+        """
+        end_time = self.end_time or datetime.datetime.now()
+        return {
+            'messages': self.messages,
+            'filtered': self.filtered,
+            'tasks': len(self.tasks),
+            'dead_letters': len(self.dead_letters),
+            'seconds': round((end_time - self.start_time).total_seconds(), 3),
+        }
+
+    def describe(self):
+        """Describe Batch
+
+        Id, file tag, offset ranges keyed by `topic:partition` and
+        metrics of the batch, as keyword arguments of ETL_Client.write.
+        Taken before the snapshot, which empties the datasets.
+        """
+        return {
+            'etl_id': self.etl_id,
+            'tag': self.tag(),
+            'partitions': {'%s:%d' % (self.topic, p): list(r) for p, r in self.offsets.items()},
+            'metrics': self.metrics(),
+        }
+
+    def snapshot(self):
+        """Snapshot Datasets
+
+        Hand over the buffered datasets as RecordBatches keyed by schema
+        name. Dead letters are only included when there are any.
+        """
+        batches = {
+            'etl_meta': self.etl.flush(),
+            'buffer_meta': self.buffers.flush(),
+            'log_meta': self.logs.flush(),
+            self.dataset: self.tasks.flush(),
+        }
+        if len(self.dead_letters) > 0:
+            batches['dead_letter'] = self.dead_letters.flush()
+
+        return batches
@@ -0,0 +1,51 @@
+import logging
+import json
+import os
+
+# Environment Variables
+JSON_DECODER=os.getenv('JSON_DECODER', 'AUTO')
+
+def _orjson():
+    import orjson
+
+    return orjson.loads
+
+def _msgspec():
+    import msgspec
+
+    return msgspec.json.Decoder().decode
+
+def _stdlib():
+    return json.loads
+
+# Every backend decodes the raw message bytes directly; the stdlib parser
+# detects the utf8 encoding itself, so no intermediate str is built.
+BACKENDS = {
+    'ORJSON': _orjson,
+    'MSGSPEC': _msgspec,
+    'JSON': _stdlib,
+}
+
+def get_decoder(name=JSON_DECODER):
+    """Get Decoder
+
+    Resolve a JSON decoding backend, falling back to the stdlib parser
+    when the requested package is not installed or the name is unknown.
+
+    Args:
+        name: ORJSON, MSGSPEC, JSON, or AUTO for the fastest available,
+            in any case
+    """
+    name = name.upper()
+    if name != 'AUTO' and name not in BACKENDS:
+        logging.warning('Unknown JSON decoder %s, expected AUTO or one of %s, falling back to JSON' % (name, ', '.join(BACKENDS)))
+        name = 'JSON'
+
+    names = list(BACKENDS) if name == 'AUTO' else [name, 'JSON']
+    for backend in names:
+        try:
+            return backend, BACKENDS[backend]()
+        except ImportError:
+            logging.warning('JSON decoder %s unavailable, falling back' % backend)
+
+DECODER, loads = get_decoder()
@@ -0,0 +1,124 @@
+import datetime
+
+def _get(obj, key, name):
+    if not isinstance(obj, dict):
+        raise TypeError('%s is not an object' % name)
+
+    if not key in obj:
+        raise KeyError('%s missing from %s object' % (key, name))
+
+    return obj[key]
+
+def _typed(value, type, name):
+    if value is not None and not isinstance(value, type):
+        raise TypeError('%s expected %s, received %s' % (name, type.__name__, value.__class__.__name__))
+
+    return value
+
+def _timestamp(value):
+    """Task Timestamp
+
+    Validate a `%Y-%m-%dT%H:%M:%SZ` task timestamp and return it in the
+    raw tier's `%Y-%m-%dT%H:%M:%S.%f` format.
+    """
+    if not isinstance(value, str) or len(value) != 20 or value[-1] != 'Z':
+        raise ValueError('TIMESTAMP %r does not match %%Y-%%m-%%dT%%H:%%M:%%SZ' % (value,))
+
+    return datetime.datetime.fromisoformat(value[:-1]).isoformat(timespec='microseconds')
+
+class Participant:
+    """Participant
+
+    Hero of one user in a Starting Match task.
+    """
+    __slots__ = ('user_token', 'id', 'attack', 'health')
+
+    def __init__(self, user_token, id, attack, health):
+        self.user_token = user_token
+        self.id = id
+        self.attack = attack
+        self.health = health
+
+class Starting_Match:
+    """Starting Match
+
+    lib.server.lobby task announcing a match and its participants.
+    """
+    __slots__ = ('timestamp', 'game_token', 'participants')
+    log_message = 'Starting Match'
+
+    def __init__(self, timestamp, game_token, participants):
+        self.timestamp = timestamp
+        self.game_token = game_token
+        self.participants = participants
+
+    @classmethod
+    def decode(cls, task):
+        """Decode Task
+
+        Build the record from a decoded task, validating its structure
+        and types in the same pass.
+
+        Args:
+            task: decoded task object
+        """
+        payload = _get(task, 'PAYLOAD', 'task')
+        heros = _get(payload, 'PARTICIPANTS_HEROS', 'task payload')
+        if not isinstance(heros, dict):
+            raise TypeError('PARTICIPANTS_HEROS is not an object')
+
+        return cls(
+            _timestamp(_get(task, 'TIMESTAMP', 'task')),
+            _typed(_get(payload, 'GAME_TOKEN', 'task payload'), str, 'GAME_TOKEN'),
+            [
+                Participant(
+                    _typed(k, str, 'USER_TOKEN'),
+                    _typed(_get(v, 'id', 'participant'), int, 'id'),
+                    _typed(_get(v, 'attack', 'participant'), int, 'attack'),
+                    _typed(_get(v, 'health', 'participant'), int, 'health'))
+                for k, v in heros.items()
+            ])
+
+class Attack_Completed:
+    """Attack Completed
+
+    lib.server.game task reporting the outcome of one attack.
+    """
+    __slots__ = (
+        'timestamp', 'game_token', 'user_token', 'action', 'enemy_token',
+        'enemy_damage', 'enemy_health_prior', 'enemy_health_post')
+    log_message = 'Attack Completed'
+
+    def __init__(self, timestamp, game_token, user_token, action, enemy_token, enemy_damage, enemy_health_prior, enemy_health_post):
+        self.timestamp = timestamp
+        self.game_token = game_token
+        self.user_token = user_token
+        self.action = action
+        self.enemy_token = enemy_token
+        self.enemy_damage = enemy_damage
+        self.enemy_health_prior = enemy_health_prior
+        self.enemy_health_post = enemy_health_post
+
+    @classmethod
+    def decode(cls, task):
+        """Decode Task
+
+        Build the record from a decoded task, validating its structure
+        and types in the same pass.
+
+        Args:
+            task: decoded task object
+        """
+        payload = _get(task, 'PAYLOAD', 'task')
+        status = _get(task, 'STATUS', 'task')
+        details = _get(status, 'DETAILS', 'task status')
+
+        return cls(
+            _timestamp(_get(task, 'TIMESTAMP', 'task')),
+            _typed(_get(payload, 'GAME_TOKEN', 'task payload'), str, 'GAME_TOKEN'),
+            _typed(_get(payload, 'USER_TOKEN', 'task payload'), str, 'USER_TOKEN'),
+            _typed(_get(status, 'ACTION', 'task status'), str, 'ACTION'),
+            _typed(_get(details, 'ENEMY_TOKEN', 'task details'), str, 'ENEMY_TOKEN'),
+            _typed(_get(details, 'ENEMY_DAMAGE', 'task details'), int, 'ENEMY_DAMAGE'),
+            _typed(_get(details, 'ENEMY_HEALTH_PRIOR', 'task details'), int, 'ENEMY_HEALTH_PRIOR'),
+            _typed(_get(details, 'ENEMY_HEALTH_POST', 'task details'), int, 'ENEMY_HEALTH_POST'))
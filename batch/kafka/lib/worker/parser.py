@@ -1,18 +1,35 @@
 from fsspec.implementations.local import LocalFileSystem
-from functools import wraps
+from standardizer.profiles import get_profile
+from standardizer.registry import DATASETS
+from lib.worker.context import Batch_Context
+from lib.worker.messages import Starting_Match, Attack_Completed
+from lib.worker.decoder import loads
+from lib.worker.schema import SCHEMA_RAW_LIB_SERVER_LOBBY, SCHEMA_RAW_LIB_SERVER_GAME
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 
 import pyarrow.parquet as pq
-import pyarrow as pa
 import datetime
+import hashlib
+import logging
 import json
+import gzip
 import uuid
 import os
+import io
 
 # Environment Variables
 OUTPUT_DIR=os.getenv('OUTPUT_DIR', '/usr/local/data/datasim_superhero')
 OUTPUT_FS=os.getenv('OUTPUT_FS', 'LOCAL')
+OUTPUT_FORMAT=os.getenv('OUTPUT_FORMAT', 'JSON')
+OUTPUT_STANDARD_DIR=os.getenv('OUTPUT_STANDARD_DIR', OUTPUT_DIR)
+FLUSH_WORKERS=int(os.getenv('FLUSH_WORKERS', 4))
+PREFILTER=os.getenv('PREFILTER', 'META')
+PREFILTER_HEADER=os.getenv('PREFILTER_HEADER', 'log_message')
 
 # Setup
+flush_executor = ThreadPoolExecutor(max_workers=FLUSH_WORKERS, thread_name_prefix='flush')
+
 if OUTPUT_FS == 'GCP':
     # Credentials DOC
     #
@@ -63,275 +80,516 @@ elif OUTPUT_FS == 'AZURE':
 else:
     filesystem = LocalFileSystem()
 
-def validate_buffer(f):
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        parser, buffer = args
+def headers(headers):
+    """Headers
 
-        assert(isinstance(buffer.checksum if buffer.checksum else 'NA', str))
-        assert(isinstance(buffer.headers if buffer.headers else [], list))
-        for h in buffer.headers:
-            assert(isinstance(h if h else 'NA', str))
-        
+    Kafka headers arrive as (key, bytes) pairs; the buffer meta keeps
+    them as `key=value` strings.
+    """
+    return [
+        h if isinstance(h, str) else '%s=%s' % (h[0], h[1].decode('utf8', 'replace') if h[1] else '')
+        for h in headers or ()
+    ]
 
-        assert(isinstance(buffer.key if buffer.key else 'NA', str))
-        assert(isinstance(buffer.offset if buffer.offset else 0, int))
-        assert(isinstance(buffer.partition if buffer.partition else 0, int))
-        assert(isinstance(buffer.serialized_key_size if buffer.serialized_key_size else 0, int))
-        assert(isinstance(buffer.serialized_value_size if buffer.serialized_value_size else 0, int))
-        assert(isinstance(buffer.timestamp if buffer.timestamp else 0, int))
-        assert(isinstance(datetime.datetime.fromtimestamp(buffer.timestamp / 1000), datetime.datetime))
-        assert(isinstance(buffer.timestamp_type if buffer.timestamp_type else 0, int))
-        assert(isinstance(buffer.topic if buffer.topic else 'NA', str))
-        assert(isinstance(buffer._is_protocol if buffer._is_protocol else False, bool))
-
-        return f(*args, **kwargs)
-    
-    return wrapper
-
-def validate_log(f):
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        parser, log = args
-        assert('level' in log and isinstance(log['level'] if log['level'] else 'NA', str))
-        assert('timestamp' in log and isinstance(log['timestamp'] if log['timestamp'] else 'NA', str))
-        assert(isinstance(datetime.datetime.strptime(log['timestamp'], '%Y-%m-%dT%H:%M:%S.%f'), datetime.datetime))
-        assert('name' in log and isinstance(log['name'] if log['name'] else 'NA', str))
-        assert('log_message' in log and isinstance(log['log_message'] if log['log_message'] else 'NA', str))
-
-        return f(*args, **kwargs)
-    
-    return wrapper
-
-def validate_lib_server_lobby(f):
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        parser, log, task = args
-        if log['log_message'] == 'Attack Completed':
-            assert(isinstance(task, dict))
-            if not 'PAYLOAD' in task:
-                raise KeyError('Payload missing from task object')
-        
-            assert(isinstance(task['PAYLOAD'], dict))
-            if not 'PARTICIPANTS_HEROS' in task['PAYLOAD']:
-                raise KeyError('Participants Heros missing from task payload object')
-
-            assert(isinstance(task['PAYLOAD']['PARTICIPANTS_HEROS'], dict))
-            assert('TIMESTAMP' in task and isinstance(task['TIMESTAMP'] if task['TIMESTAMP'] else 'NA', str))
-            assert(isinstance(datetime.datetime.strptime(task['TIMESTAMP'], '%Y-%m-%dT%H:%M:%SZ'), datetime.datetime))
-            assert(
-                'GAME_TOKEN' in task['PAYLOAD']['GAME_TOKEN'] and \
-                isinstance(task['PAYLOAD']['GAME_TOKEN'] if task['PAYLOAD']['GAME_TOKEN'] else 'NA', str))
-        
-            participants = task['PAYLOAD']['PARTICIPANTS_HEROS']
-            for k,v in participants.items():
-                assert(isinstance(k if k else 'NA', str))
-                assert('id' in v and isinstance(v['id'] if v['id'] else 0, int))
-                assert('attack' in v and isinstance(v['attack'] if v['attack'] else 0, int))
-                assert('health' in v and isinstance(v['health'] if v['health'] else 0, int))
-        
-        return f(*args, **kwargs)
-    
-    return wrapper
-
-def validate_lib_server_game(f):
-    @wraps(f)
-    def wrapper(*args, **kwargs):
-        parser, log, task = args
-        if log['log_message'] == 'Attack Completed':
-            assert(isinstance(task, dict))
-            if not 'PAYLOAD' in task:
-                raise KeyError('Payload missing from task object')
-        
-            if not 'STATUS' in task:
-                raise KeyError('Status missing from task object')
-        
-            if not 'DETAILS' in task['STATUS']:
-                raise KeyError('Details missing from task\'s Status object')
-        
-            assert('TIMESTAMP' in task and isinstance(task['TIMESTAMP'] if task['TIMESTAMP'] else 'NA', str))
-            assert(isinstance(datetime.datetime.strptime(task['TIMESTAMP'], '%Y-%m-%dT%H:%M:%SZ'), datetime.datetime))
-            assert(
-                'GAME_TOKEN' in task['PAYLOAD'] and \
-                isinstance(task['PAYLOAD']['GAME_TOKEN'] if task['PAYLOAD']['GAME_TOKEN'] else 'NA', str))
-            assert(
-                'USER_TOKEN' in task['PAYLOAD'] and \
-                isinstance(task['PAYLOAD']['USER_TOKEN'] if task['PAYLOAD']['USER_TOKEN'] else 'NA', str))
-            assert(
-                'ACTION' in task['STATUS'] and \
-                isinstance(task['STATUS']['ACTION'] if task['STATUS']['ACTION'] else 'NA', str))
-            assert(
-                'ENEMY_TOKEN' in task['STATUS']['DETAILS'] and \
-                isinstance(task['STATUS']['DETAILS']['ENEMY_TOKEN'] if task['STATUS']['DETAILS']['ENEMY_TOKEN'] else 'NA', str))
-            assert(
-                'ENEMY_DAMAGE' in task['STATUS']['DETAILS'] and \
-                isinstance(task['STATUS']['DETAILS']['ENEMY_DAMAGE'] if task['STATUS']['DETAILS']['ENEMY_DAMAGE'] else 0, int))
-            assert(
-                'ENEMY_HEALTH_PRIOR' in task['STATUS']['DETAILS'] and \
-                isinstance(task['STATUS']['DETAILS']['ENEMY_HEALTH_PRIOR'] if task['STATUS']['DETAILS']['ENEMY_HEALTH_PRIOR'] else 0, int))
-            assert(
-                'ENEMY_HEALTH_POST' in task['STATUS']['DETAILS'] and \
-                isinstance(task['STATUS']['DETAILS']['ENEMY_HEALTH_POST'] if task['STATUS']['DETAILS']['ENEMY_HEALTH_POST'] else 0, int))
-
-        return f(*args, **kwargs)
-    
-    return wrapper
+class Hashing_Writer:
+    """Hashing Writer
+
+    Binary file wrapper taking the size and md5 of everything written
+    through it, so staged files are described without reading them back
+    from the object store.
+
+    Args:
+        f: binary file opened for writing
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.size = 0
+        self.md5 = hashlib.md5()
+
+    @property
+    def closed(self):
+        return self.f.closed
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.size += memoryview(data).nbytes
+        self.md5.update(data)
+        return self.f.write(data)
+
+    def tell(self):
+        return self.size
+
+    def flush(self):
+        self.f.flush()
+
+    def close(self):
+        pass
+
+    def written(self):
+        return {'bytes': self.size, 'md5': self.md5.hexdigest()}
+
+def check_buffer(buffer):
+    assert(isinstance(buffer.checksum if buffer.checksum else 'NA', str))
+    assert(isinstance(buffer.headers if buffer.headers else [], (list, tuple)))
+    for h in buffer.headers:
+        assert(isinstance(h if h else 'NA', (str, tuple)))
+
+    assert(isinstance(buffer.key if buffer.key else 'NA', str))
+    assert(isinstance(buffer.offset if buffer.offset else 0, int))
+    assert(isinstance(buffer.partition if buffer.partition else 0, int))
+    assert(isinstance(buffer.serialized_key_size if buffer.serialized_key_size else 0, int))
+    assert(isinstance(buffer.serialized_value_size if buffer.serialized_value_size else 0, int))
+    assert(isinstance(buffer.timestamp if buffer.timestamp else 0, int))
+    assert(isinstance(datetime.datetime.fromtimestamp(buffer.timestamp / 1000), datetime.datetime))
+    assert(isinstance(buffer.timestamp_type if buffer.timestamp_type else 0, int))
+    assert(isinstance(buffer.topic if buffer.topic else 'NA', str))
+    assert(isinstance(buffer._is_protocol if buffer._is_protocol else False, bool))
+
+def check_log(log):
+    assert('level' in log and isinstance(log['level'] if log['level'] else 'NA', str))
+    assert('timestamp' in log and isinstance(log['timestamp'] if log['timestamp'] else 'NA', str))
+    assert(isinstance(datetime.datetime.strptime(log['timestamp'], '%Y-%m-%dT%H:%M:%S.%f'), datetime.datetime))
+    assert('name' in log and isinstance(log['name'] if log['name'] else 'NA', str))
+    assert('log_message' in log and isinstance(log['log_message'] if log['log_message'] else 'NA', str))
 
 
 class ETL_Client:
-    etl=[]
-    buffers=[]
-    logs=[]
-    tasks=[]
-    etl_id=str(uuid.uuid4())
+    schema=None
+    dataset=None
+    message=None
+
+    def __init__(self):
+        self.context = Batch_Context(self.schema, self.dataset)
+        self._spares = deque()
+        self._probe = self.message.log_message.encode('utf8') if self.message else None
+
+    @property
+    def etl(self):
+        return self.context.etl
+
+    @property
+    def buffers(self):
+        return self.context.buffers
+
+    @property
+    def logs(self):
+        return self.context.logs
+
+    @property
+    def tasks(self):
+        return self.context.tasks
+
+    @property
+    def etl_id(self):
+        return self.context.etl_id
 
     @property
     def start_time(self):
-        return self._start_time
+        return self.context.start_time
     
     @start_time.setter
     def start_time(self, start_time):
-        self._start_time = start_time
+        self.context.start_time = start_time
 
     @property
     def end_time(self):
-        return self._end_time
+        return self.context.end_time
     
     @end_time.setter
     def end_time(self, end_time):
-        self._end_time = end_time
+        self.context.end_time = end_time
     
     @property
     def msg_id(self):
         return self._msg_id
     
-    def generate_msg_id(self):
-        self._msg_id = str(uuid.uuid4())
-    
     def clean(self):
-        self.etl=[]
-        self.buffers=[]
-        self.logs=[]
-        self.tasks=[]
-        self._etl_id = str(uuid.uuid4())
+        self.context.reset()
+
+    def rotate(self):
+        """Rotate Context
+
+        Close the filling batch context and swap in a fresh one, reusing
+        a released context when one is available. The closed context is
+        returned to be flushed while the new one fills.
+        """
+        closed = self.context
+        self.context = self._spares.pop() if self._spares else Batch_Context(self.schema, self.dataset)
+        self.context.reset()
+
+        return closed
+
+    def release(self, context):
+        """Release Context
+
+        Hand a flushed context back for reuse. Safe to call from the
+        flush thread.
+
+        Args:
+            context: Batch_Context returned by rotate
+        """
+        self._spares.append(context)
 
     def extract(self, msg):
-        log = json.loads(msg.value.decode('utf8'))
+        log = loads(msg.value)
         if isinstance(log['task'], str):
-            task = json.loads(log['task'])
+            task = loads(log['task'])
         else:
             task = log['task']
         
         return msg, log, task
     
-    @validate_log
-    def transform_log(self, log):
-        self.logs.extend([{
-            'etl_id': self.etl_id,
-            'msg_id': self.msg_id,
-            'level': log['level'],
-            'timestamp': log['timestamp'],
-            'name': log['name'],
-            'log_message': log['log_message'],
-        }])
+    def extract_transform(self, msgs):
+        """Extract & Transform Messages
+
+        Extract, validate and buffer a whole fetch of one partition.
+        Every message is validated before any of its rows are appended.
+
+        Messages of other types are pre-filtered by PREFILTER: `META`
+        only validates and records their buffer and log meta, `DROP`
+        skips them, and `OFF` sends them down the full path.
+
+        A message that fails to decode, validate or buffer is rolled
+        back, so none of its rows are kept, and dead lettered. The
+        rest of the fetch carries on.
+
+        Args:
+            msgs: list of Kafka ConsumerRecords
+        """
+        extract, decode_task, relevant = self.extract, self.decode_task, self.relevant
+        append_buffer, append_log, append_task = self._append_buffer, self._append_log, self._append_task
+        context = self.context
+        if msgs:
+            context.track(msgs)
+        for msg in msgs:
+            mark = context.mark()
+            try:
+                if PREFILTER != 'OFF' and not relevant(msg):
+                    if PREFILTER == 'META':
+                        log = loads(msg.value)
+                        check_buffer(msg)
+                        check_log(log)
+
+                        self._msg_id = str(uuid.uuid4())
+                        append_buffer(msg)
+                        append_log(log)
+                    context.filtered += 1
+                    continue
+
+                msg, log, task = extract(msg)
+                check_buffer(msg)
+                check_log(log)
+                record = decode_task(log, task)
+
+                self._msg_id = str(uuid.uuid4())
+                append_buffer(msg)
+                append_log(log)
+                append_task(record)
+            except Exception as err:
+                context.rollback(mark)
+                self.dead_letter(msg, err)
+
+    def dead_letter(self, msg, err):
+        """Dead Letter
+
+        Keep a message that could not be ingested, with its error, in
+        the batch's dead_letter dataset.
+
+        Args:
+            msg: Kafka ConsumerRecord
+            err: exception the message raised
+        """
+        logging.warning('Dead lettering %s:%d offset %d: %r' % (msg.topic, msg.partition, msg.offset, err))
+        value = msg.value
+        if isinstance(value, bytes):
+            value = value.decode('utf8', 'replace')
+
+        self.context.dead_letters.append(
+            self.etl_id,
+            msg.topic,
+            msg.partition,
+            msg.offset,
+            None if msg.key is None else str(msg.key),
+            None if value is None else str(value),
+            '%s: %s' % (err.__class__.__name__, err))
+
+    def relevant(self, msg):
+        """Relevant Message
+
+        Cheap check for the client's message type ahead of decoding. A
+        `log_message` header is matched exactly when the publisher sets
+        one; otherwise the raw value is probed for the message name. The
+        probe may pass a message of another type, which decode_task then
+        ignores, but never rejects one of the client's own.
+
+        Args:
+            msg: Kafka ConsumerRecord
+        """
+        for key, value in msg.headers or ():
+            if key == PREFILTER_HEADER:
+                return value == self._probe
+
+        return self._probe in msg.value
+
+    def decode_task(self, log, task):
+        """Decode Task
+
+        Decode and validate the task of the client's message type in one
+        pass. Returns None for every other log message.
+
+        Args:
+            log: decoded log object
+            task: decoded task object
+        """
+        if log['log_message'] == self.message.log_message:
+            return self.message.decode(task)
+
+    def _append_log(self, log):
+        self.logs.append(
+            self.etl_id,
+            self.msg_id,
+            log['level'],
+            log['timestamp'],
+            log['name'],
+            log['log_message'])
     
-    @validate_buffer
-    def transform_buffer(self, msg):
-        self.buffers.extend([{
-            'etl_id': self.etl_id,
-            'msg_id': self.msg_id,
-            'checksum': msg.checksum,
-            'headers': msg.headers,
-            'key': msg.key,
-            'offset': msg.offset,
-            'partition': msg.partition,
-            'serialized_key_size': msg.serialized_key_size,
-            'serialized_value_size': msg.serialized_value_size,
-            'timestamp': datetime.datetime.fromtimestamp(msg.timestamp / 1000).strftime('%Y-%m-%dT%H:%M:%S.%f'),
-            'timestamp_type': msg.timestamp_type,
-            'topic': msg.topic,
-            '_is_protocol': msg._is_protocol,
-        }])
+    def _append_buffer(self, msg):
+        self.buffers.append(
+            self.etl_id,
+            self.msg_id,
+            msg.checksum,
+            headers(msg.headers),
+            msg.key,
+            msg.offset,
+            msg.partition,
+            msg.serialized_key_size,
+            msg.serialized_value_size,
+            datetime.datetime.fromtimestamp(msg.timestamp / 1000).strftime('%Y-%m-%dT%H:%M:%S.%f'),
+            msg.timestamp_type,
+            msg.topic,
+            msg._is_protocol)
     
     def transform_etl(self):
-        self.etl.append({
-            'etl_id': self.etl_id,
-            'service': 'Kafka',
-            'mode': 'Batch',
-            'timestamp_start': self._start_time.strftime('%Y-%m-%dT%H:%M:%S.%f'),
-            'timestamp_end': self._end_time.strftime('%Y-%m-%dT%H:%M:%S.%f')
-        })
-
-    def load_parquet(self, data, schema, schema_name):
-        map = {}
-        for k in schema.names:
-            map[k] = []
-    
-        for r in data:
-            for k in r.keys():
-                map[k].append(r[k])
-    
-        tbl = pa.Table.from_pydict(
-            dict(zip(schema.names, tuple([map[c] for c in map.keys()]))),
-            schema=schema
-        )
-
-        partition_path = os.path.join(OUTPUT_DIR, 'raw', schema_name, datetime.date.today().strftime('%Y/%m/%d'))
-        if not os.path.isdir(partition_path):
-            os.makedirs(partition_path)
+        self.etl.append(
+            self.etl_id,
+            'Kafka',
+            'Batch',
+            self.start_time.strftime('%Y-%m-%dT%H:%M:%S.%f'),
+            self.end_time.strftime('%Y-%m-%dT%H:%M:%S.%f'))
+
+    def snapshot(self):
+        """Snapshot Datasets
+
+        Hand over the buffered datasets of the filling context as
+        RecordBatches keyed by schema name, and start new ones.
+        """
+        return self.context.snapshot()
+
+    def write(self, batches, batch_id=None, etl_id=None, metrics=None, tag=None, partitions=None):
+        """Write Datasets
+
+        Stage the datasets concurrently on the flush pool, then move the
+        files to their final paths together once every one is written.
+
+        Args:
+            batches: RecordBatches keyed by schema name
+            batch_id: staging id, generated when None
+            etl_id: ETL id the batches were built under
+            metrics: batch metrics recorded in the manifest
+            tag: partition and offset range added to the file names
+            partitions: first and last offset of the batch keyed by
+                `topic:partition`
+
+        Returns:
+            batch manifest, listing the dataset, rows, bytes and md5 of
+            every file
+        """
+        batch_id = batch_id or str(uuid.uuid4())
+        etl_id = etl_id or self.etl_id
+        staged = flush_executor.map(
+            lambda item: self.stage(item[1], item[0], batch_id, etl_id, tag),
+            batches.items())
+
+        files = [f for dataset_files in staged for f in dataset_files]
+        self.publish([(path, final) for path, final, _ in files])
+
+        manifest = {
+            'batch_id': batch_id,
+            'etl_id': etl_id,
+            'partitions': partitions or {},
+            'files': [entry for _, _, entry in files],
+        }
+        if metrics:
+            manifest['metrics'] = metrics
+
+        return manifest
+
+    def stage(self, batch, schema_name, batch_id, etl_id=None, tag=None):
+        """Stage Dataset
+
+        Load a dataset under its batch and describe the staged files.
+
+        Returns:
+            list of (staged, final, manifest entry)
+        """
+        return [
+            (staged, final, dict(path=final, dataset=schema_name, **written))
+            for staged, final, written in self.load(batch, schema_name, batch_id, etl_id, tag)
+        ]
+
+    def publish(self, files):
+        """Publish Files
+
+        Move staged files to their final paths and drop the staging
+        directories, including the tier's staging root once empty.
+        Nothing under a staging directory is routed by the standardizer,
+        so a batch only becomes visible once it is moved.
+
+        Args:
+            files: list of (staged, final) paths
+        """
+        staging = set()
+        for staged, final in files:
+            if staged != final:
+                filesystem.mv(staged, final)
+                staging.add(os.path.dirname(staged))
+
+        for path in staging:
+            if filesystem.exists(path):
+                filesystem.rm(path, recursive=True)
+
+        # Object stores drop a prefix with its last object, while a local
+        # staging root stays until it is removed. It is only removed when
+        # empty, so a batch still staging keeps it.
+        if OUTPUT_FS == 'LOCAL':
+            for path in set(os.path.dirname(path) for path in staging):
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    pass
+
+    def load(self, batch, schema_name, batch_id=None, etl_id=None, tag=None):
+        """Load Dataset
+
+        Args:
+            batch: pyarrow RecordBatch of the dataset
+            schema_name: dataset name
+            batch_id: stage the files under this batch, or write them
+                to their final paths when None
+            etl_id: ETL id of the batch, defaults to the client's
+            tag: partition and offset range of the batch, e.g. `p3_1200-2199`
+
+        Returns:
+            list of (staged, final, rows, bytes and md5 written)
+        """
+        file_name = '%s_%d' % (etl_id or self.etl_id, int(datetime.datetime.timestamp(datetime.datetime.now()) * 1000000))
+        if tag:
+            file_name = '%s_%s' % (file_name, tag)
+        files = []
+        # Datasets the standardizer does not know, like dead letters,
+        # are only kept raw
+        if OUTPUT_FORMAT in ['JSON', 'BOTH'] or schema_name not in DATASETS:
+            files.append(self.load_json(batch, schema_name, file_name, batch_id=batch_id))
         
-        ts = int(datetime.datetime.timestamp(datetime.datetime.now()) * 1000000)
-        file_path = os.path.join(partition_path, '%s_%d.parquet.gz' % (self.etl_id, ts))
-        pq.write_table(
-            tbl,
-            where=file_path,
-            filesystem=filesystem,
-            compression='gzip'
-        )
+        if OUTPUT_FORMAT in ['PARQUET', 'BOTH'] and schema_name in DATASETS:
+            # The standardizer's own transform, so rows it would
+            # quarantine from the raw JSON are quarantined here as well
+            standard, rejected = DATASETS[schema_name].transform(batch)
+            for tier, tbl in [('standard', standard), ('quarantine', rejected)]:
+                if tier == 'standard' or tbl.num_rows > 0:
+                    files.append(self.load_parquet(
+                        tbl,
+                        schema_name,
+                        file_name,
+                        output_dir=OUTPUT_STANDARD_DIR,
+                        tier=tier,
+                        batch_id=batch_id))
+
+        return files
+
+    def output_path(self, output_dir, tier, schema_name, file_name, batch_id=None):
+        partition_path = os.path.join(output_dir, tier, schema_name, datetime.date.today().strftime('%Y/%m/%d'))
+        final = os.path.join(partition_path, file_name)
+
+        staged = final
+        if batch_id:
+            # Staged inside the tier, so an empty OUTPUT_DIR (the Azure
+            # container is the tier) still stages into an existing root
+            staged = os.path.join(output_dir, tier, '_staging', batch_id, '%s.%s' % (schema_name, file_name))
+
+        if OUTPUT_FS == 'LOCAL':
+            for path in set([partition_path, os.path.dirname(staged)]):
+                os.makedirs(path, exist_ok=True)
+
+        return staged, final
+
+    def load_parquet(self, tbl, schema_name, file_name, output_dir=OUTPUT_DIR, tier='raw', batch_id=None):
+        profile = get_profile()
+
+        staged, final = self.output_path(output_dir, tier, schema_name, file_name + profile.suffix, batch_id)
+        with filesystem.open(staged, 'wb') as f:
+            out = Hashing_Writer(f)
+            pq.write_table(
+                tbl,
+                where=out,
+                row_group_size=profile.row_group_size(tbl),
+                **profile.options(tbl.schema)
+            )
+
+        return staged, final, dict(rows=tbl.num_rows, **out.written())
     
-    def load_json(self, data, schema_name):
-        partition_path = os.path.join(OUTPUT_DIR, 'raw', schema_name, datetime.date.today().strftime('%Y/%m/%d'))
-        if OUTPUT_FS  == 'LOCAL' and not os.path.isdir(partition_path):
-            os.makedirs(partition_path)
+    def load_json(self, batch, schema_name, file_name, batch_id=None):
+        staged, final = self.output_path(OUTPUT_DIR, 'raw', schema_name, '%s.json.gzip' % file_name, batch_id)
 
-        ts = int(datetime.datetime.timestamp(datetime.datetime.now()) * 1000000)
-        file_path = os.path.join(partition_path, '%s_%d.json.gzip' % (self.etl_id, ts))
+        with filesystem.open(staged, 'wb') as f:
+            out = Hashing_Writer(f)
+            with io.TextIOWrapper(gzip.GzipFile(fileobj=out, mode='wb'), encoding='utf8') as text:
+                for record in batch.to_pylist():
+                    text.write(json.dumps(record))
+                    text.write('\n')
 
-        with filesystem.open(file_path, 'w', compression='gzip') as f:
-            json.dump(data, f)
+        return staged, final, dict(rows=batch.num_rows, **out.written())
 
 class ETL_Lib_Server_Lobby(ETL_Client):
-    
-    @validate_lib_server_lobby
-    def transform(self, log, task):
-        if log['log_message'] == 'Starting Match':
-            participants = task['PAYLOAD']['PARTICIPANTS_HEROS']
-            self.tasks.extend([{
-                'etl_id': self.etl_id,
-                'msg_id': self.msg_id,
-                'timestamp': datetime.datetime.strptime(task['TIMESTAMP'], '%Y-%m-%dT%H:%M:%SZ').strftime('%Y-%m-%dT%H:%M:%S.%f'),
-                'game_token': task['PAYLOAD']['GAME_TOKEN'],
-                'user_token': k,
-                'superhero_id': v['id'],
-                'superhero_attack': v['attack'],
-                'superhero_health': v['health'],
-            } for k,v in participants.items()])
+    schema=SCHEMA_RAW_LIB_SERVER_LOBBY
+    dataset='lib_server_lobby'
+    message=Starting_Match
+
+    def _append_task(self, match):
+        if match is None:
+            return
+
+        for participant in match.participants:
+            self.tasks.append(
+                self.etl_id,
+                self.msg_id,
+                match.timestamp,
+                match.game_token,
+                participant.user_token,
+                participant.id,
+                participant.attack,
+                participant.health)
 
 class ETL_Lib_Server_Game(ETL_Client):
-    
-    @validate_lib_server_game
-    def transform(self, log, task):
-        if log['log_message'] == 'Attack Completed':
-            self.tasks.extend([{
-                'etl_id': self.etl_id,
-                'msg_id': self.msg_id,
-                'timestamp': datetime.datetime.strptime(task['TIMESTAMP'], '%Y-%m-%dT%H:%M:%SZ').strftime('%Y-%m-%dT%H:%M:%S.%f'),
-                'game_token': task['PAYLOAD']['GAME_TOKEN'],
-                'user_token': task['PAYLOAD']['USER_TOKEN'],
-                'action': task['STATUS']['ACTION'],
-                'enemy_token': task['STATUS']['DETAILS']['ENEMY_TOKEN'],
-                'enemy_damage': task['STATUS']['DETAILS']['ENEMY_DAMAGE'],
-                'enemy_health_prior': task['STATUS']['DETAILS']['ENEMY_HEALTH_PRIOR'],
-                'enemy_health_post': task['STATUS']['DETAILS']['ENEMY_HEALTH_POST'],
-            }])
-    
\ No newline at end of file
+    schema=SCHEMA_RAW_LIB_SERVER_GAME
+    dataset='lib_server_game'
+    message=Attack_Completed
+
+    def _append_task(self, attack):
+        if attack is None:
+            return
+
+        self.tasks.append(
+            self.etl_id,
+            self.msg_id,
+            attack.timestamp,
+            attack.game_token,
+            attack.user_token,
+            attack.action,
+            attack.enemy_token,
+            attack.enemy_damage,
+            attack.enemy_health_prior,
+            attack.enemy_health_post)
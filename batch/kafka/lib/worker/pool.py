@@ -0,0 +1,137 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import multiprocessing
+import datetime
+import asyncio
+import logging
+import os
+
+# Environment Variables
+ETL_POOL=os.getenv('ETL_POOL', 'PROCESS')
+ETL_WORKERS=int(os.getenv('ETL_WORKERS', os.cpu_count() or 1))
+
+# ETL clients of the partitions pinned to this slot, keyed by (topic, partition)
+_clients = {}
+
+def _client(client_cls, key):
+    if key not in _clients:
+        _clients[key] = client_cls()
+
+    return _clients[key]
+
+def _extract_transform(client_cls, key, msgs):
+    _client(client_cls, key).extract_transform(msgs)
+
+def _end(client_cls, key):
+    client = _client(client_cls, key)
+    client.end_time = datetime.datetime.now()
+    if len(client.tasks) == 0:
+        return None
+
+    client.transform_etl()
+    context = client.rotate()
+    try:
+        info = context.describe()
+        return context.snapshot(), info
+    finally:
+        client.release(context)
+
+def _drop(key):
+    _clients.pop(key, None)
+
+class Partition_Pool:
+    """Partition Pool
+
+    Runs one ETL client per assigned TopicPartition on a pool of worker
+    slots. Each slot is a single-worker executor - a process with
+    ETL_POOL=PROCESS, otherwise a thread - so a partition's messages are
+    transformed in order while partitions on different slots transform
+    in parallel. Partitions are spread over the slots as they are
+    assigned, so throughput scales with cores up to the partition count.
+
+    Args:
+        client_cls: ETL_Client subclass instantiated per partition
+        workers: number of slots
+        mode: PROCESS or THREAD
+    """
+
+    def __init__(self, client_cls, workers=ETL_WORKERS, mode=ETL_POOL):
+        self.client_cls = client_cls
+        self.workers = max(1, workers)
+        self.mode = mode
+        self._slots = {}
+        self._assignment = {}
+        self._writer = client_cls()
+
+    def _slot(self, i):
+        if i not in self._slots:
+            if self.mode == 'PROCESS':
+                self._slots[i] = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+            else:
+                self._slots[i] = ThreadPoolExecutor(max_workers=1, thread_name_prefix='etl-%d' % i)
+
+        return self._slots[i]
+
+    def _key(self, tp):
+        return (tp.topic, tp.partition)
+
+    def assign(self, tps):
+        for tp in tps:
+            if tp in self._assignment:
+                continue
+
+            load = [0] * self.workers
+            for i in self._assignment.values():
+                load[i] += 1
+            self._assignment[tp] = load.index(min(load))
+            logging.info('Partition %s:%d pinned to ETL slot %d' % (tp.topic, tp.partition, self._assignment[tp]))
+
+    def revoke(self, tps):
+        for tp in tps:
+            if tp in self._assignment:
+                self._slot(self._assignment.pop(tp)).submit(_drop, self._key(tp))
+
+    def submit(self, tp, func, *args):
+        if tp not in self._assignment:
+            self.assign([tp])
+
+        future = self._slot(self._assignment[tp]).submit(func, self.client_cls, self._key(tp), *args)
+        return asyncio.wrap_future(future)
+
+    async def extract_transform(self, msg_set):
+        """Extract & Transform
+
+        Args:
+            msg_set: result of consumer.getmany
+        """
+        await asyncio.gather(*[
+            self.submit(tp, _extract_transform, msgs)
+            for tp, msgs in msg_set.items() if msgs
+        ])
+
+    def end(self, tps=None):
+        """End Batch
+
+        Close the batch of the given partitions. Returns a flush per
+        partition resolving to its batch manifest, or None when the
+        partition buffered no tasks and carries over to the next batch.
+
+        Args:
+            tps: partitions to close, every assigned one when None.
+                Partitions no longer assigned are skipped.
+        """
+        tps = list(self._assignment) if tps is None else [tp for tp in tps if tp in self._assignment]
+        return {tp: self._flush(self.submit(tp, _end)) for tp in tps}
+
+    async def _flush(self, end):
+        result = await end
+        if result is None:
+            return None
+
+        batches, info = result
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: self._writer.write(batches, **info))
+
+    def shutdown(self):
+        for slot in self._slots.values():
+            slot.shutdown(wait=True)
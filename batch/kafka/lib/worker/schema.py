@@ -0,0 +1,44 @@
+from standardizer.schema import SCHEMA_ETL_META, SCHEMA_BUFFER_META, SCHEMA_LOG_META
+from standardizer.schema import SCHEMA_LIB_SERVER_LOBBY, SCHEMA_LIB_SERVER_GAME
+
+import pyarrow as pa
+
+def _raw_field(f):
+    if pa.types.is_timestamp(f.type):
+        return pa.field(f.name, pa.utf8())
+
+    if pa.types.is_integer(f.type):
+        return pa.field(f.name, pa.int64())
+
+    return f
+
+def raw_schema(schema):
+    """Raw Schema
+
+    The raw tier keeps timestamps as the formatted strings written
+    to the JSON blobs, and every integer as int64, so it takes any
+    value a message carries. Parsing, narrowing and validation are
+    left to the standardizer.
+
+    Args:
+        schema: standard pyarrow schema
+    """
+    return pa.schema([_raw_field(f) for f in schema])
+
+SCHEMA_RAW_ETL_META = raw_schema(SCHEMA_ETL_META)
+SCHEMA_RAW_BUFFER_META = raw_schema(SCHEMA_BUFFER_META)
+SCHEMA_RAW_LOG_META = raw_schema(SCHEMA_LOG_META)
+SCHEMA_RAW_LIB_SERVER_LOBBY = raw_schema(SCHEMA_LIB_SERVER_LOBBY)
+SCHEMA_RAW_LIB_SERVER_GAME = raw_schema(SCHEMA_LIB_SERVER_GAME)
+
+# Messages the worker could not decode or buffer, kept as received.
+# Written to the raw tier only; the standardizer does not route them.
+SCHEMA_RAW_DEAD_LETTER = pa.schema({
+    'etl_id': pa.utf8(),
+    'topic': pa.utf8(),
+    'partition': pa.int64(),
+    'offset': pa.int64(),
+    'key': pa.utf8(),
+    'value': pa.utf8(),
+    'error': pa.utf8(),
+})
@@ -0,0 +1,129 @@
+from aiokafka.structs import ConsumerRecord
+from lib.worker.parser import ETL_Lib_Server_Game
+from lib.worker import parser
+
+import datetime
+import json
+
+def game_msg(offset, damage=5, health_post=45, value=None, value_size=None):
+    task = {
+        'TIMESTAMP': '2023-01-01T10:00:00Z',
+        'PAYLOAD': {'GAME_TOKEN': 'g1', 'USER_TOKEN': 'u1'},
+        'STATUS': {'ACTION': 'attack', 'DETAILS': {
+            'ENEMY_TOKEN': 'u2',
+            'ENEMY_DAMAGE': damage,
+            'ENEMY_HEALTH_PRIOR': 50,
+            'ENEMY_HEALTH_POST': health_post,
+        }},
+    }
+    if value is None:
+        value = json.dumps({
+            'level': 'INFO',
+            'timestamp': '2023-01-01T10:00:00.123456',
+            'name': 'lib.server.game',
+            'log_message': 'Attack Completed',
+            'task': json.dumps(task),
+        }).encode('utf8')
+
+    return ConsumerRecord(
+        topic='lib.server.game', partition=0, offset=offset, timestamp=1672567200000, timestamp_type=0,
+        key='', value=value, checksum=None, serialized_key_size=0,
+        serialized_value_size=len(value) if value_size is None else value_size, headers=())
+
+def rows(client):
+    return {name: batch.to_pydict() for name, batch in client.snapshot().items()}
+
+def write(client):
+    client.end_time = datetime.datetime.now()
+    client.transform_etl()
+    context = client.rotate()
+    return client.write(context.snapshot(), **context.describe())
+
+def test_negative_health_is_kept_raw():
+    client = ETL_Lib_Server_Game()
+    client.extract_transform([game_msg(0, health_post=-5)])
+
+    batches = rows(client)
+    assert batches['lib_server_game']['enemy_health_post'] == [-5]
+    assert 'dead_letter' not in batches
+
+def test_large_serialized_value_size_is_kept_raw():
+    client = ETL_Lib_Server_Game()
+    client.extract_transform([game_msg(0, value_size=40000)])
+
+    assert rows(client)['buffer_meta']['serialized_value_size'] == [40000]
+
+def test_value_beyond_int64_is_dead_lettered():
+    client = ETL_Lib_Server_Game()
+    client.extract_transform([game_msg(0), game_msg(1, damage=2 ** 70), game_msg(2)])
+
+    batches = rows(client)
+    assert len(batches['buffer_meta']['msg_id']) == 2
+    assert len(batches['log_meta']['msg_id']) == 2
+    assert batches['lib_server_game']['enemy_damage'] == [5, 5]
+    assert batches['dead_letter']['offset'] == [1]
+    assert 'ENEMY_DAMAGE' in batches['dead_letter']['error'][0] or 'OverflowError' in batches['dead_letter']['error'][0]
+
+def test_overflow_rolls_back_the_whole_message():
+    client = ETL_Lib_Server_Game()
+    client.extract_transform([game_msg(0)])
+    record = client.message.decode(json.loads(json.loads(game_msg(1).value)['task']))
+    record.enemy_damage = 2 ** 70
+    client.decode_task = lambda log, task: record
+    client.extract_transform([game_msg(1)])
+
+    batches = rows(client)
+    assert len(batches['buffer_meta']['msg_id']) == 1
+    assert len(batches['log_meta']['msg_id']) == 1
+    assert batches['lib_server_game']['enemy_damage'] == [5]
+    assert batches['dead_letter']['error'][0].startswith('OverflowError')
+
+def test_malformed_message_leaves_no_rows():
+    client = ETL_Lib_Server_Game()
+    client.extract_transform([game_msg(0, value=b'{"level": "INFO", "truncated')])
+
+    batches = rows(client)
+    assert batches['buffer_meta']['msg_id'] == []
+    assert batches['log_meta']['msg_id'] == []
+    assert batches['dead_letter']['value'] == ['{"level": "INFO", "truncated']
+
+def test_out_of_range_rows_are_quarantined(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser, 'OUTPUT_FORMAT', 'BOTH')
+    monkeypatch.setattr(parser, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(parser, 'OUTPUT_STANDARD_DIR', str(tmp_path))
+
+    client = ETL_Lib_Server_Game()
+    client.extract_transform([game_msg(0), game_msg(1, health_post=-5, value_size=40000)])
+    manifest = write(client)
+
+    written = {(f['path'].split('/')[len(str(tmp_path).split('/'))], f['dataset']): f['rows'] for f in manifest['files']}
+    assert written[('raw', 'lib_server_game')] == 2
+    assert written[('standard', 'lib_server_game')] == 1
+    assert written[('quarantine', 'lib_server_game')] == 1
+    assert written[('raw', 'buffer_meta')] == 2
+    assert written[('standard', 'buffer_meta')] == 1
+    assert written[('quarantine', 'buffer_meta')] == 1
+
+def test_prefiltered_message_with_a_malformed_log_leaves_no_rows():
+    client = ETL_Lib_Server_Game()
+    log = {'level': 'INFO', 'timestamp': '2023-01-01 10:00', 'name': 'lib.server.game', 'log_message': 'Attack Initiated', 'task': '{}'}
+    client.extract_transform([game_msg(0, value=json.dumps(log).encode('utf8')), game_msg(1)])
+
+    batches = rows(client)
+    assert client.context.filtered == 0
+    assert len(batches['buffer_meta']['msg_id']) == 1
+    assert len(batches['log_meta']['msg_id']) == 1
+    assert batches['dead_letter']['offset'] == [0]
+
+def test_publish_leaves_no_staging_directories(tmp_path, monkeypatch):
+    monkeypatch.setattr(parser, 'OUTPUT_FORMAT', 'BOTH')
+    monkeypatch.setattr(parser, 'OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setattr(parser, 'OUTPUT_STANDARD_DIR', str(tmp_path))
+
+    client = ETL_Lib_Server_Game()
+    client.extract_transform([game_msg(0)])
+    write(client)
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['raw', 'standard']
+    for tier in tmp_path.iterdir():
+        assert '_staging' not in [p.name for p in tier.iterdir()]
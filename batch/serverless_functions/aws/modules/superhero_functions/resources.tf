@@ -74,7 +74,8 @@ data "aws_iam_policy_document" "s3-cloud-watch-policy-document" {
     effect    = "Allow"
     actions   = [
       "s3:GetObject",
-      "s3:PutObject"
+      "s3:PutObject",
+      "s3:AbortMultipartUpload"
     ]
 
     resources = var.bucket_arns
@@ -112,14 +113,27 @@ resource "aws_iam_role_policy" "this" {
 /*Zip Main Source Code
 
 Zip the latest changes to the Function Source Code
-Prior to deployment
+along with the shared standardizer package Prior
+to deployment
 */
 data "archive_file" "this" {
   type             = "zip"
-  source_file      = "./source/${var.function_source}.py"
   output_file_mode = "0666"
   output_path      = "./source/${var.function_name}.zip"
 
+  source {
+    content  = file("./source/${var.function_source}.py")
+    filename = "${var.function_source}.py"
+  }
+
+  dynamic "source" {
+    for_each = fileset("../standardizer", "*.py")
+    content {
+      content  = file("../standardizer/${source.value}")
+      filename = "standardizer/${source.value}"
+    }
+  }
+
   //Stops archiving the function during plan
   depends_on = [ aws_iam_role_policy.this ]
 }
@@ -20,11 +20,12 @@ terraform{
 
 /* Install Dependency
 
-Install the Python dependency with Pip
+Install the Python dependency with Pip, and copy the shared
+standardizer package next to the function folders
 */
 resource "null_resource" "this" {
   provisioner "local-exec" {
-    command = "pip install --upgrade --target ./source/.python_packages/lib/site-packages -r ./source/requirements.txt"
+    command = "pip install --upgrade --target ./source/.python_packages/lib/site-packages -r ./source/requirements.txt && rm -rf ./source/standardizer && cp -r ../standardizer ./source/standardizer"
   }
 }
  
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# Cold Start Benchmark
+#
+# Time a fresh interpreter importing a standardizer entry point and
+# handling its first dataset, as a cold function instance would.
+#
+#   python batch/serverless_functions/benchmarks/cold_start.py --runs 10
+#   python batch/serverless_functions/benchmarks/cold_start.py --module gcp/source/main.py
+
+import statistics
+import subprocess
+import argparse
+import json
+import sys
+import os
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+DATASETS = ['etl_meta', 'buffer_meta', 'log_meta', 'lib_server_lobby', 'lib_server_game']
+
+PROBE = '''
+import importlib.util
+import time
+import json
+import sys
+
+module, dataset = sys.argv[1], sys.argv[2]
+
+start = time.perf_counter()
+if module:
+    spec = importlib.util.spec_from_file_location('entry_point', module)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+import standardizer
+imported = time.perf_counter()
+
+standardizer.DATASETS[dataset].transform([])
+done = time.perf_counter()
+
+print(json.dumps({'import': imported - start, 'first_use': done - imported}))
+'''
+
+def probe(module, dataset):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    out = subprocess.run(
+        [sys.executable, '-c', PROBE, module, dataset],
+        env=env, check=True, capture_output=True, text=True)
+
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Standardizer cold start benchmark')
+    parser.add_argument('--runs', type=int, default=5, help='fresh interpreters per dataset')
+    parser.add_argument('--module', default='', help='entry point to import, relative to batch/serverless_functions')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    module = os.path.join(ROOT, args.module) if args.module else ''
+    results = {}
+    for dataset in DATASETS:
+        runs = [probe(module, dataset) for _ in range(args.runs)]
+        results[dataset] = {
+            k: statistics.median([r[k] for r in runs]) * 1000
+            for k in ['import', 'first_use']
+        }
+        results[dataset]['total'] = results[dataset]['import'] + results[dataset]['first_use']
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print('%-18s %10s %10s %10s' % ('dataset', 'import ms', 'first ms', 'total ms'))
+    for dataset, r in results.items():
+        print('%-18s %10.1f %10.1f %10.1f' % (dataset, r['import'], r['first_use'], r['total']))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# Parquet Profile Benchmark
+#
+# Write the same standard tables with every Parquet profile and report
+# write time against file size. Synthetic lib_server_game and log_meta
+# tables are used unless a standard tier file is given.
+#
+#   python batch/serverless_functions/benchmarks/parquet_profiles.py --rows 500000
+#   python batch/serverless_functions/benchmarks/parquet_profiles.py --input compact_1690000000000.parquet.gzip
+
+import statistics
+import argparse
+import random
+import json
+import time
+import uuid
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from standardizer.schema import SCHEMA_LIB_SERVER_GAME, SCHEMA_LOG_META
+from standardizer.profiles import PROFILES
+
+import pyarrow.parquet as pq
+import pyarrow as pa
+
+def tokens(n):
+    return [str(uuid.uuid4()) for _ in range(n)]
+
+def game_table(rows, games=2000, users=10000):
+    """Synthetic lib_server_game rows, shaped after the simulator's attacks"""
+    game_tokens, user_tokens, etl_id = tokens(games), tokens(users), str(uuid.uuid4())
+    start = int(time.time())
+    health = [random.randint(0, 500) for _ in range(rows)]
+    damage = [random.randint(1, 60) for _ in range(rows)]
+
+    return pa.table({
+        'etl_id': [etl_id] * rows,
+        'msg_id': tokens(rows),
+        'timestamp': pa.array([start + i // 100 for i in range(rows)], pa.int64()).cast(pa.timestamp('s')),
+        'game_token': [random.choice(game_tokens) for _ in range(rows)],
+        'user_token': [random.choice(user_tokens) for _ in range(rows)],
+        'action': [random.choice(['Attack', 'Heal', 'Defend']) for _ in range(rows)],
+        'enemy_token': [random.choice(user_tokens) for _ in range(rows)],
+        'enemy_damage': damage,
+        'enemy_health_prior': health,
+        'enemy_health_post': [max(h - d, 0) for h, d in zip(health, damage)],
+    }, schema=SCHEMA_LIB_SERVER_GAME)
+
+def log_table(rows):
+    """Synthetic log_meta rows of both simulator topics"""
+    etl_id = str(uuid.uuid4())
+    start = int(time.time() * 1000)
+    messages = ['Attack Completed', 'Attack Initiated', 'Starting Match', 'Cleaning Game Records', 'Joined Lobby']
+
+    return pa.table({
+        'etl_id': [etl_id] * rows,
+        'msg_id': tokens(rows),
+        'level': [random.choice(['INFO', 'INFO', 'INFO', 'DEBUG', 'WARNING']) for _ in range(rows)],
+        'timestamp': pa.array([start + i for i in range(rows)], pa.int64()).cast(pa.timestamp('ms')),
+        'name': [random.choice(['lib.server.game', 'lib.server.lobby']) for _ in range(rows)],
+        'log_message': [random.choice(messages) for _ in range(rows)],
+    }, schema=SCHEMA_LOG_META)
+
+def write(tbl, profile):
+    sink = pa.BufferOutputStream()
+    start = time.perf_counter()
+    with pq.ParquetWriter(sink, tbl.schema, **profile.options(tbl.schema)) as writer:
+        writer.write_table(tbl, row_group_size=profile.row_group_size(tbl))
+    elapsed = time.perf_counter() - start
+
+    return elapsed, sink.getvalue().size
+
+def main():
+    parser = argparse.ArgumentParser(description='Parquet writer profile benchmark')
+    parser.add_argument('--rows', type=int, default=200000, help='rows per synthetic table')
+    parser.add_argument('--runs', type=int, default=3, help='writes per profile, the median is reported')
+    parser.add_argument('--input', help='standard tier Parquet file to write instead of the synthetic tables')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='comma separated profiles')
+    parser.add_argument('--json', action='store_true', help='print results as JSON')
+    args = parser.parse_args()
+
+    random.seed(0)
+    if args.input:
+        tables = {os.path.basename(args.input): pq.read_table(args.input)}
+    else:
+        tables = {'lib_server_game': game_table(args.rows), 'log_meta': log_table(args.rows)}
+
+    results = {}
+    for name, tbl in tables.items():
+        results[name] = {}
+        for profile in [PROFILES[p.strip().upper()] for p in args.profiles.split(',')]:
+            runs = [write(tbl, profile) for _ in range(args.runs)]
+            results[name][profile.name] = {
+                'write_ms': statistics.median([r[0] for r in runs]) * 1000,
+                'bytes': runs[-1][1],
+                'ratio': tbl.nbytes / runs[-1][1],
+            }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    for name, profiles in results.items():
+        print('%s (%d rows, %d bytes in memory)' % (name, tables[name].num_rows, tables[name].nbytes))
+        print('  %-10s %10s %12s %8s' % ('profile', 'write ms', 'bytes', 'ratio'))
+        for profile, r in profiles.items():
+            print('  %-10s %10.1f %12d %8.2f' % (profile, r['write_ms'], r['bytes'], r['ratio']))
+
+if __name__ == '__main__':
+    main()
@@ -18,7 +18,8 @@ terraform{
 /*Zip Main Source Code
 
 Zip the latest changes to the Function Source Code
-Prior to deployment
+along with the shared standardizer package Prior
+to deployment
 */
 data "archive_file" "this" {
   type             = "zip"
@@ -34,6 +35,14 @@ data "archive_file" "this" {
     content  = file("./source/requirements.txt")
     filename = "requirements.txt"
   }
+
+  dynamic "source" {
+    for_each = fileset("../standardizer", "*.py")
+    content {
+      content  = file("../standardizer/${source.value}")
+      filename = "standardizer/${source.value}"
+    }
+  }
 }
 
 /* Upload GCP Functions Source
@@ -0,0 +1,13 @@
+# Shared Standardizer
+#
+# Single source of the standard schemas, transforms and dataset router
+# used by every serverless runtime. Each runtime only adapts its own
+# trigger and filesystem. Importing the package stays light; pyarrow
+# and the schemas load on a dataset's first use.
+
+from standardizer.compaction import Compactor, Row_Group_Writer
+from standardizer.profiles import PROFILES, Parquet_Profile, get_profile
+from standardizer.clients import CLIENTS, Client_Cache, credential_expiry
+from standardizer.registry import DATASETS, Dataset, preload, route
+from standardizer.storage import tier_path, parquet_writer
+from standardizer.stream import standardize
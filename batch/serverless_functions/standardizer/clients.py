@@ -0,0 +1,79 @@
+import threading
+import datetime
+import time
+import os
+
+# Environment Variables
+CLIENT_TTL=int(os.getenv('CLIENT_TTL', 2700))
+CLIENT_EXPIRY_MARGIN=int(os.getenv('CLIENT_EXPIRY_MARGIN', 300))
+
+class Client_Cache:
+    """Client Cache
+
+    Keep authenticated filesystems and clients alive across warm
+    invocations, so the TLS and auth handshakes only happen on a cold
+    start or once the credentials are about to expire.
+    """
+
+    def __init__(self, ttl=CLIENT_TTL, margin=CLIENT_EXPIRY_MARGIN):
+        self.ttl = ttl
+        self.margin = margin
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, factory, expiry=None):
+        """Get Client
+
+        Args:
+            key: cache key of the client
+            factory: callable building a new client
+            expiry: optional callable(client) returning the epoch second
+                its credentials expire, or None when they don't
+
+        Returns:
+            cached client, rebuilt when its expiry (less the margin) or
+            the TTL has passed
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.time() >= entry[1]:
+                client = factory()
+                expires_at = expiry(client) if expiry else None
+                if expires_at is None:
+                    expires_at = time.time() + self.ttl
+
+                entry = (client, expires_at - self.margin)
+                self._entries[key] = entry
+
+            return entry[0]
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+def credential_expiry(credentials):
+    """Credential Expiry
+
+    Epoch second a credentials object expires, or None when it does not
+    expire or does not say. Reads azure.core access tokens (expires_on),
+    google.auth credentials (expiry, naive UTC) and botocore refreshable
+    credentials (_expiry_time).
+
+    Args:
+        credentials: credentials or access token of a client
+    """
+    expires_on = getattr(credentials, 'expires_on', None)
+    if isinstance(expires_on, (int, float)):
+        return expires_on
+
+    for name in ('expiry', '_expiry_time'):
+        expiry = getattr(credentials, name, None)
+        if isinstance(expiry, datetime.datetime):
+            if expiry.tzinfo is None:
+                expiry = expiry.replace(tzinfo=datetime.timezone.utc)
+            return expiry.timestamp()
+
+CLIENTS = Client_Cache()
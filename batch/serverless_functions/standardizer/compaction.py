@@ -0,0 +1,228 @@
+from standardizer.stream import iter_batches, write_batches
+from standardizer.profiles import get_profile
+from standardizer.storage import tier_path
+from standardizer.registry import route
+
+import threading
+import datetime
+import logging
+import json
+import time
+import os
+
+# Environment Variables
+COMPACT_WINDOW=int(os.getenv('COMPACT_WINDOW', 300))
+COMPACT_MAX_BYTES=int(os.getenv('COMPACT_MAX_BYTES', 64 << 20))
+COMPACT_ROW_GROUP_SIZE=int(os.getenv('COMPACT_ROW_GROUP_SIZE', 100000))
+COMPACT_SCAN_DAYS=int(os.getenv('COMPACT_SCAN_DAYS', 2))
+
+MANIFEST_SUFFIX = '.manifest'
+
+class Row_Group_Writer:
+    """Row Group Writer
+
+    Wraps a ParquetWriter and holds tables back until a full row group
+    has accumulated, so many small inputs still produce well-sized row
+    groups.
+
+    Args:
+        writer: pyarrow ParquetWriter
+        row_group_size: rows per row group
+        row_group_bytes: close a row group early once it holds this many
+            uncompressed bytes, no limit when None
+    """
+
+    def __init__(self, writer, row_group_size=COMPACT_ROW_GROUP_SIZE, row_group_bytes=None):
+        self.writer = writer
+        self.row_group_size = row_group_size
+        self.row_group_bytes = row_group_bytes
+        self._tables = []
+        self._rows = 0
+        self._bytes = 0
+
+    def write_table(self, tbl):
+        self._tables.append(tbl)
+        self._rows += tbl.num_rows
+        self._bytes += tbl.nbytes
+        if self._rows >= self.row_group_size or (self.row_group_bytes and self._bytes >= self.row_group_bytes):
+            self.flush()
+
+    def flush(self):
+        import pyarrow as pa
+
+        if self._rows > 0:
+            self.writer.write_table(pa.concat_tables(self._tables), row_group_size=self.row_group_size)
+
+        self._tables = []
+        self._rows = 0
+        self._bytes = 0
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.writer.close()
+
+class Group:
+    """Group
+
+    Raw blobs of one dataset and day partition awaiting compaction.
+    """
+
+    def __init__(self, directory, opened):
+        self.directory = directory
+        self.opened = opened
+        self.paths = []
+        self.bytes = 0
+
+class Compactor:
+    """Compactor
+
+    Coalesce the raw blobs of each `raw/<dataset>/YYYY/MM/DD` partition
+    into a single standard Parquet file. A group is compacted once its
+    raw size reaches `max_bytes` or its first blob is `window` seconds
+    old. Every compacted file is followed by a manifest listing its
+    inputs; the manifests are read back on start up so merged blobs are
+    never standardized twice. Start up only reads the day partitions of
+    the last `scan_days` days.
+
+    Args:
+        root: directory holding the raw and standard tiers
+        filesystem: fsspec filesystem of root
+        open_json: callable(path) returning a readable text stream
+        open_writer: callable(path, schema, tier) returning a ParquetWriter
+        row_group_bytes: row group byte target, the Parquet profile's
+            when None
+        scan_days: days of partitions read on start up, all when 0
+    """
+
+    def __init__(self, root, filesystem, open_json, open_writer,
+                 window=COMPACT_WINDOW, max_bytes=COMPACT_MAX_BYTES, row_group_size=COMPACT_ROW_GROUP_SIZE, row_group_bytes=None,
+                 scan_days=COMPACT_SCAN_DAYS):
+        self.root = root.rstrip('/')
+        self.filesystem = filesystem
+        self.open_json = open_json
+        self.open_writer = open_writer
+        self.window = window
+        self.max_bytes = max_bytes
+        self.row_group_size = row_group_size
+        self.row_group_bytes = row_group_bytes or get_profile().row_group_bytes
+        self.scan_days = scan_days
+
+        self._lock = threading.Lock()
+        self._groups = {}
+        self.merged = set(self._load_manifests())
+
+    def _glob(self, tier, pattern):
+        if not self.scan_days:
+            return self.filesystem.glob('%s/%s/**/%s' % (self.root, tier, pattern))
+
+        today, paths = datetime.date.today(), []
+        for days in range(self.scan_days):
+            day = (today - datetime.timedelta(days=days)).strftime('%Y/%m/%d')
+            paths.extend(self.filesystem.glob('%s/%s/*/%s/%s' % (self.root, tier, day, pattern)))
+
+        return paths
+
+    def _load_manifests(self):
+        for path in self._glob('standard', '*%s' % MANIFEST_SUFFIX):
+            with self.filesystem.open(path, 'r') as f:
+                yield from json.load(f)['inputs']
+
+    def scan(self):
+        """Scan Raw Tier
+
+        Queue raw blobs that were written while the compactor was down.
+        Blobs with a standard file of their own, written in FILE mode,
+        are skipped.
+        """
+        standardized = {}
+        for path in self._glob('raw', '*.json.gzip'):
+            directory = os.path.dirname(tier_path(path))
+            if directory not in standardized:
+                standardized[directory] = set(os.path.basename(p).split('.')[0] for p in self.filesystem.glob('%s/*.parquet.*' % directory))
+
+            if os.path.basename(path).split('.')[0] not in standardized[directory]:
+                self.add(path)
+
+    def add(self, path):
+        """Add Blob
+
+        Args:
+            path: raw blob path
+        """
+        if route(path) is None:
+            return
+
+        with self._lock:
+            if path in self.merged:
+                return
+
+            directory = os.path.dirname(path)
+            group = self._groups.setdefault(directory, Group(directory, time.time()))
+            if path in group.paths:
+                return
+
+            group.paths.append(path)
+            group.bytes += self.filesystem.size(path)
+
+    def flush(self, force=False):
+        """Flush Groups
+
+        Compact every group that is full or past its window.
+
+        Args:
+            force: compact all pending groups regardless of size or age
+        """
+        now = time.time()
+        with self._lock:
+            ready = [
+                directory for directory, group in self._groups.items()
+                if force or group.bytes >= self.max_bytes or now - group.opened >= self.window
+            ]
+            groups = [self._groups.pop(directory) for directory in ready]
+
+        for group in groups:
+            self.compact(group)
+
+    def _read(self, paths, failed):
+        for path in paths:
+            try:
+                with self.open_json(path) as f:
+                    yield from iter_batches(f)
+            except json.decoder.JSONDecodeError:
+                logging.warning('Skipping malformed raw blob %s' % path)
+                failed.append(path)
+
+    def compact(self, group):
+        """Compact Group
+
+        Args:
+            group: Group of raw blobs sharing a dataset and day
+        """
+        dataset = route(group.paths[0])
+        target = '%s/compact_%d.json.gzip' % (group.directory, time.time() * 1000)
+
+        logging.info('Compacting %d raw blobs (%d bytes) of %s into %s' % (
+            len(group.paths), group.bytes, dataset.name, tier_path(target)
+        ))
+
+        failed = []
+        rows = write_batches(
+            self._read(group.paths, failed),
+            dataset,
+            lambda schema, tier: Row_Group_Writer(self.open_writer(target, schema, tier), self.row_group_size, self.row_group_bytes)
+        )
+
+        manifest = os.path.join(os.path.dirname(tier_path(target)), os.path.basename(target).split('.')[0] + MANIFEST_SUFFIX)
+        with self.filesystem.open(manifest, 'w') as f:
+            json.dump({
+                'dataset': dataset.name,
+                'output': tier_path(target),
+                'inputs': group.paths,
+                'failed': failed,
+                'rows': rows,
+            }, f)
+
+        with self._lock:
+            self.merged.update(group.paths)
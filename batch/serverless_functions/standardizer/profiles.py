@@ -0,0 +1,116 @@
+import logging
+import os
+
+# Environment Variables
+PARQUET_PROFILE=os.getenv('PARQUET_PROFILE', 'GZIP')
+PARQUET_ROW_GROUP_BYTES=int(os.getenv('PARQUET_ROW_GROUP_BYTES', 64 << 20))
+
+# Columns unique to each row, where dictionary pages are pure overhead.
+# Every other column - low cardinality ones like action, topic, level,
+# name and log_message, but also the repeated game and user tokens -
+# is dictionary encoded.
+PLAIN_COLUMNS = ('msg_id', 'checksum', 'offset', 'timestamp', 'timestamp_start', 'timestamp_end')
+BLOOM_FILTER_COLUMNS = ('game_token',)
+BLOOM_FILTER_NDV = 1 << 14
+
+class Parquet_Profile:
+    """Parquet Profile
+
+    Named set of Parquet writer settings. Options the installed pyarrow
+    does not support (e.g. page indexes before 13, Bloom filters before
+    19) are dropped with a warning, so one profile works on every
+    runtime.
+
+    Args:
+        name: profile name
+        compression: codec - gzip, snappy, lz4 or zstd
+        compression_level: codec level, codec default when None
+        dictionary: skip dictionary encoding of the PLAIN_COLUMNS,
+            instead of encoding every column
+        statistics: write column chunk statistics
+        page_index: write page level statistics (column and offset index)
+        bloom_filters: write Bloom filters on BLOOM_FILTER_COLUMNS
+        row_group_bytes: target uncompressed bytes per row group, the
+            writer default row count when None
+    """
+
+    def __init__(self, name, compression, compression_level=None, dictionary=False, statistics=True, page_index=False, bloom_filters=False, row_group_bytes=None):
+        self.name = name
+        self.compression = compression
+        self.compression_level = compression_level
+        self.dictionary = dictionary
+        self.statistics = statistics
+        self.page_index = page_index
+        self.bloom_filters = bloom_filters
+        self.row_group_bytes = row_group_bytes
+
+    @property
+    def suffix(self):
+        """File suffix naming the codec, e.g. .parquet.zstd"""
+        return '.parquet.%s' % self.compression
+
+    def options(self, schema):
+        """Writer Options
+
+        Keyword arguments of pyarrow.parquet.ParquetWriter for a schema.
+
+        Args:
+            schema: pyarrow schema of the file
+        """
+        import pyarrow.parquet as pq
+        import inspect
+
+        names = set(schema.names)
+        options = {
+            'compression': self.compression,
+            'compression_level': self.compression_level,
+            'write_statistics': self.statistics,
+        }
+        if self.dictionary:
+            options['use_dictionary'] = [c for c in schema.names if c not in PLAIN_COLUMNS]
+        if self.page_index:
+            options['write_page_index'] = True
+        if self.bloom_filters and names.intersection(BLOOM_FILTER_COLUMNS):
+            options['bloom_filter_options'] = {c: {'ndv': BLOOM_FILTER_NDV, 'fpp': 0.05} for c in BLOOM_FILTER_COLUMNS if c in names}
+
+        supported = inspect.signature(pq.ParquetWriter.__init__).parameters
+        for option in [o for o in options if o not in supported]:
+            logging.warning('Parquet profile %s: %s is not supported by this pyarrow' % (self.name, option))
+            del options[option]
+
+        return options
+
+    def row_group_size(self, tbl):
+        """Row Group Size
+
+        Rows per row group reaching row_group_bytes for a table's
+        average row width.
+
+        Args:
+            tbl: pyarrow Table about to be written
+        """
+        if not self.row_group_bytes or tbl.num_rows == 0:
+            return None
+
+        return max(1, self.row_group_bytes * tbl.num_rows // max(tbl.nbytes, 1))
+
+PROFILES = {p.name: p for p in [
+    # Settings Parquet files were written with so far
+    Parquet_Profile('GZIP', 'gzip'),
+    Parquet_Profile('SNAPPY', 'snappy', dictionary=True, page_index=True, row_group_bytes=PARQUET_ROW_GROUP_BYTES),
+    Parquet_Profile('LZ4', 'lz4', dictionary=True, page_index=True, row_group_bytes=PARQUET_ROW_GROUP_BYTES),
+    Parquet_Profile('ZSTD', 'zstd', 1, dictionary=True, page_index=True, bloom_filters=True, row_group_bytes=PARQUET_ROW_GROUP_BYTES),
+    Parquet_Profile('ZSTD_MAX', 'zstd', 9, dictionary=True, page_index=True, bloom_filters=True, row_group_bytes=PARQUET_ROW_GROUP_BYTES),
+]}
+
+def get_profile(name=None):
+    """Get Profile
+
+    Args:
+        name: profile name, PARQUET_PROFILE when None
+    """
+    name = (name or PARQUET_PROFILE).upper()
+    if name not in PROFILES:
+        raise ValueError('Unknown Parquet profile %s, expected one of %s' % (name, ', '.join(PROFILES)))
+
+    return PROFILES[name]
@@ -0,0 +1,71 @@
+from functools import cached_property
+
+import importlib
+import os
+
+# Environment Variables
+STANDARDIZER_PRELOAD=os.getenv('STANDARDIZER_PRELOAD', '')
+
+class Dataset:
+    """Dataset
+
+    Registry entry of a raw dataset. The schema and transform are
+    named rather than imported, so pyarrow is only loaded and the
+    schemas only built the first time an invocation needs them; the
+    result is then kept for the life of the instance.
+    """
+
+    def __init__(self, name, schema, transform):
+        self.name = name
+        self._schema = schema
+        self._transform = transform
+
+    def __repr__(self):
+        return 'Dataset(%s)' % self.name
+
+    @cached_property
+    def schema(self):
+        return getattr(importlib.import_module('standardizer.schema'), self._schema)
+
+    @cached_property
+    def transform(self):
+        return getattr(importlib.import_module('standardizer.transforms'), self._transform)
+
+DATASETS = {
+    'etl_meta': Dataset('etl_meta', 'SCHEMA_ETL_META', 'transform_etl'),
+    'buffer_meta': Dataset('buffer_meta', 'SCHEMA_BUFFER_META', 'transform_buffer'),
+    'log_meta': Dataset('log_meta', 'SCHEMA_LOG_META', 'transform_log'),
+    'lib_server_lobby': Dataset('lib_server_lobby', 'SCHEMA_LIB_SERVER_LOBBY', 'transform_lib_server_lobby'),
+    'lib_server_game': Dataset('lib_server_game', 'SCHEMA_LIB_SERVER_GAME', 'transform_lib_server_game'),
+}
+
+def route(path):
+    """Route Blob
+
+    Resolve the dataset of a raw blob from its `raw/<dataset>/YYYY/MM/DD`
+    directory. Returns None for blobs outside the registry, including
+    the standard and quarantine tiers.
+
+    Args:
+        path: blob path or object name
+    """
+    parts = path.split('/')[:-1]
+    for prior, part in zip(parts, parts[1:]):
+        if prior == 'raw' and part in DATASETS:
+            return DATASETS[part]
+
+def preload(names):
+    """Preload Datasets
+
+    Resolve datasets up front, for instances that are warmed before
+    their first trigger (e.g. provisioned concurrency).
+
+    Args:
+        names: dataset names, or ['ALL']
+    """
+    for name in (DATASETS if 'ALL' in names else names):
+        DATASETS[name].schema
+        DATASETS[name].transform
+
+if STANDARDIZER_PRELOAD:
+    preload(STANDARDIZER_PRELOAD.split(','))
@@ -0,0 +1,64 @@
+import pyarrow as pa
+
+SCHEMA_ETL_META = pa.schema({
+    'etl_id': pa.utf8(),
+    'service': pa.utf8(),
+    'mode': pa.utf8(),
+    'timestamp_start': pa.timestamp('ms'),
+    'timestamp_end': pa.timestamp('ms')
+})
+
+SCHEMA_BUFFER_META = pa.schema({
+    'etl_id': pa.utf8(),
+    'msg_id': pa.utf8(),
+    'checksum': pa.utf8(),
+    'headers': pa.list_(pa.utf8()),
+    'key': pa.utf8(),
+    'offset': pa.uint64(),
+    'partition': pa.uint8(),
+    'serialized_key_size': pa.int16(),
+    'serialized_value_size': pa.int16(),
+    'timestamp': pa.timestamp('ms'),
+    'timestamp_type': pa.uint8(),
+    'topic': pa.utf8(),
+    '_is_protocol': pa.bool_(),
+})
+
+SCHEMA_LOG_META = pa.schema({
+    'etl_id': pa.utf8(),
+    'msg_id': pa.utf8(),
+    'level': pa.utf8(),
+    'timestamp': pa.timestamp('ms'),
+    'name': pa.utf8(),
+    'log_message': pa.utf8()
+})
+
+SCHEMA_LIB_SERVER_LOBBY = pa.schema({
+    'etl_id': pa.utf8(),
+    'msg_id': pa.utf8(),
+    'timestamp': pa.timestamp('s'),
+    'game_token': pa.utf8(),
+    'user_token': pa.utf8(),
+    'superhero_id': pa.uint16(),
+    'superhero_attack': pa.uint64(),
+    'superhero_health': pa.uint64(),
+})
+
+SCHEMA_LIB_SERVER_GAME = pa.schema({
+    'etl_id': pa.utf8(),
+    'msg_id': pa.utf8(),
+    'timestamp': pa.timestamp('s'),
+    'game_token': pa.utf8(),
+    'user_token': pa.utf8(),
+    'action': pa.utf8(),
+    'enemy_token': pa.utf8(),
+    'enemy_damage': pa.uint64(),
+    'enemy_health_prior': pa.uint64(),
+    'enemy_health_post': pa.uint64(),
+})
+
+SCHEMA_QUARANTINE = pa.schema({
+    'dataset': pa.utf8(),
+    'record': pa.utf8(),
+    'errors': pa.list_(pa.utf8()),
+})
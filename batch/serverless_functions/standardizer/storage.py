@@ -0,0 +1,16 @@
+from standardizer.profiles import get_profile
+
+import re
+
+def tier_path(file_path, tier='standard', profile=None):
+    return re.sub(r'\.json\.gzip$', get_profile(profile).suffix, re.sub('raw', tier, file_path))
+
+def parquet_writer(file_path, schema, filesystem, profile=None):
+    import pyarrow.parquet as pq
+
+    return pq.ParquetWriter(
+        file_path,
+        schema,
+        filesystem=filesystem,
+        **get_profile(profile).options(schema)
+    )
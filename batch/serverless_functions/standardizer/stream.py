@@ -0,0 +1,102 @@
+import json
+import os
+
+# Environment Variables
+STREAM_BATCH_SIZE=int(os.getenv('STREAM_BATCH_SIZE', 10000))
+STREAM_READ_SIZE=int(os.getenv('STREAM_READ_SIZE', 1 << 20))
+
+SEPARATORS = ' \t\r\n[,]'
+
+def iter_records(f, read_size=STREAM_READ_SIZE):
+    """Iterate Records
+
+    Incrementally decode the JSON objects of a text stream. Accepts
+    both newline-delimited JSON and the legacy single JSON array, so
+    only one read buffer is held in memory at a time.
+
+    Args:
+        f: readable text stream
+        read_size: characters read per refill
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof = '', 0, False
+    while True:
+        while pos < len(buffer) and buffer[pos] in SEPARATORS:
+            pos += 1
+
+        if pos == len(buffer):
+            if eof:
+                return
+            
+            buffer, pos = f.read(read_size), 0
+            eof = not buffer
+            continue
+
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.decoder.JSONDecodeError:
+            if eof:
+                raise
+            
+            chunk = f.read(read_size)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+
+        yield record
+
+def iter_batches(f, batch_size=STREAM_BATCH_SIZE):
+    batch = []
+    for record in iter_records(f):
+        batch.append(record)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+def write_batches(batches, dataset, open_writer):
+    """Write Batches
+
+    Transform raw record batches, writing each batch as a row group.
+    The quarantine writer is only opened once a record is rejected.
+
+    Args:
+        batches: iterable of raw record lists
+        dataset: registry Dataset of the records
+        open_writer: callable(schema, tier) returning a ParquetWriter
+
+    Returns:
+        rows written per tier
+    """
+    writers, rows = {}, {'standard': 0, 'quarantine': 0}
+    try:
+        writers['standard'] = open_writer(dataset.schema, 'standard')
+        for raw in batches:
+            tbl, rejected = dataset.transform(raw)
+            writers['standard'].write_table(tbl)
+            rows['standard'] += tbl.num_rows
+
+            if rejected.num_rows > 0:
+                if 'quarantine' not in writers:
+                    writers['quarantine'] = open_writer(rejected.schema, 'quarantine')
+                writers['quarantine'].write_table(rejected)
+                rows['quarantine'] += rejected.num_rows
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    return rows
+
+def standardize(f, dataset, open_writer):
+    """Standardize Stream
+
+    Transform a raw JSON stream batch by batch, so peak memory is
+    bounded by STREAM_BATCH_SIZE rather than the file size.
+
+    Args:
+        f: readable text stream of raw records
+        dataset: registry Dataset of the stream
+        open_writer: callable(schema, tier) returning a ParquetWriter
+    """
+    return write_batches(iter_batches(f), dataset, open_writer)
@@ -0,0 +1,67 @@
+from standardizer.schema import SCHEMA_ETL_META, SCHEMA_BUFFER_META, SCHEMA_LOG_META
+from standardizer.schema import SCHEMA_LIB_SERVER_LOBBY, SCHEMA_LIB_SERVER_GAME
+from standardizer.validation import validate, quarantine
+
+import pyarrow as pa
+import logging
+
+def transform(raw, schema, dataset, required=()):
+    """Transform Records
+
+    Validate raw records column by column and build the standard
+    pyarrow Table from the valid rows. Invalid rows are returned
+    separately rather than failing the whole file.
+
+    Args:
+        raw: list of raw records, or a raw tier pyarrow RecordBatch
+        schema: standard pyarrow schema
+        dataset: dataset name of the records
+        required: names of the fields that may not be null
+
+    Returns:
+        tbl: standard table of the valid records
+        rejected: quarantine table of the invalid records
+    """
+    columns, valid, errors = validate(raw, schema, required)
+    tbl = pa.Table.from_pydict(columns, schema=schema)
+    if errors:
+        logging.warning('Quarantining %d of %d %s records' % (len(errors), len(raw), dataset))
+        tbl = tbl.filter(valid)
+
+    return tbl, quarantine(raw, errors, dataset)
+
+def transform_etl(raw):
+    logging.info('Transforming ETL messages')
+    return transform(raw, SCHEMA_ETL_META, 'etl_meta')
+
+def transform_buffer(raw):
+    logging.info('Transforming Buffer messages')
+    return transform(raw, SCHEMA_BUFFER_META, 'buffer_meta')
+
+def transform_log(raw):
+    logging.info('Transforming Log messages')
+    return transform(raw, SCHEMA_LOG_META, 'log_meta')
+
+def transform_lib_server_lobby(raw):
+    logging.info('Transforming lib.server.lobby messages')
+    return transform(raw, SCHEMA_LIB_SERVER_LOBBY, 'lib_server_lobby', required=[
+        'timestamp',
+        'game_token',
+        'user_token',
+        'superhero_id',
+        'superhero_attack',
+        'superhero_health',
+    ])
+
+def transform_lib_server_game(raw):
+    logging.info('Transforming lib.server.game messages')
+    return transform(raw, SCHEMA_LIB_SERVER_GAME, 'lib_server_game', required=[
+        'timestamp',
+        'game_token',
+        'user_token',
+        'action',
+        'enemy_token',
+        'enemy_damage',
+        'enemy_health_prior',
+        'enemy_health_post',
+    ])
@@ -0,0 +1,163 @@
+from standardizer.schema import SCHEMA_QUARANTINE
+
+import pyarrow.compute as pc
+import pyarrow as pa
+import json
+
+MISSING = object()
+ERRORS = (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError)
+
+# Shape of a `%Y-%m-%dT%H:%M:%S.%f` string. The ISO-8601 cast alone
+# would also take bare dates and space separated or minute precision
+# times.
+ISO_PATTERN = r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}\.\d{1,6}$'
+
+def parse_timestamp(array, type, format='%Y-%m-%dT%H:%M:%S.%f'):
+    """Parse Timestamp
+
+    Parse a whole string column in one call. Both raw formats are
+    supported: `%Y-%m-%dT%H:%M:%S.%f` is handed to Arrow's ISO-8601
+    cast (Arrow's strptime lacks %f) once every string matches the
+    format, `%Y-%m-%dT%H:%M:%SZ` to pyarrow.compute.strptime.
+
+    Args:
+        array: pyarrow string array
+        type: target pyarrow timestamp type
+        format: strptime format of the strings in the array
+    """
+    if format.endswith('.%f'):
+        if pc.any(pc.invert(pc.match_substring_regex(array, ISO_PATTERN))).as_py():
+            raise ValueError('Timestamps do not match %s' % format)
+        parsed = pc.cast(array, pa.timestamp('us'))
+    else:
+        parsed = pc.strptime(array, format=format, unit=type.unit)
+
+    return parsed.cast(type, safe=False)
+
+def _convert(values, field):
+    if isinstance(values, pa.Array):
+        if pa.types.is_timestamp(field.type):
+            return parse_timestamp(values, field.type)
+
+        return values.cast(field.type)
+
+    if pa.types.is_timestamp(field.type):
+        return parse_timestamp(pa.array(values, pa.utf8()), field.type)
+
+    return pa.array(values, type=field.type)
+
+def _convert_column(values, field):
+    """Convert Column
+
+    Convert the whole column in one call, casting an Arrow column
+    without leaving Arrow. Only a column that fails is revisited value
+    by value to find the offending rows.
+    """
+    try:
+        return _convert(values, field), []
+    except ERRORS:
+        pass
+
+    if isinstance(values, pa.Array):
+        values = values.to_pylist()
+
+    converted, invalid = [], []
+    for i, v in enumerate(values):
+        try:
+            _convert([v], field)
+            converted.append(v)
+        except ERRORS:
+            converted.append(None)
+            invalid.append(i)
+
+    return _convert(converted, field), invalid
+
+def _mask(length, invalid):
+    mask = [True] * length
+    for i in invalid:
+        mask[i] = False
+
+    return pa.array(mask, pa.bool_())
+
+def _columns(raw, schema):
+    if isinstance(raw, pa.RecordBatch):
+        return len(raw), {
+            f.name: raw.column(f.name) if f.name in raw.schema.names else [MISSING] * len(raw)
+            for f in schema
+        }
+
+    records = [r if isinstance(r, dict) else {} for r in raw]
+    return len(records), {f.name: [r.get(f.name, MISSING) for r in records] for f in schema}
+
+def validate(raw, schema, required=()):
+    """Validate Records
+
+    Check raw records against a standard schema one column at a time.
+    A row is invalid when a field is missing, does not convert to its
+    declared type, or is null in a required field.
+
+    Args:
+        raw: list of raw records, or a raw tier pyarrow RecordBatch
+        schema: standard pyarrow schema
+        required: names of the fields that may not be null
+
+    Returns:
+        columns: dict of pyarrow Arrays by field name, with invalid
+            values nulled out
+        valid: pyarrow boolean Array, one entry per record
+        errors: dict of error messages by invalid record index
+    """
+    length, raw_columns = _columns(raw, schema)
+    columns = {}
+    failures = []
+
+    for f in schema:
+        values = raw_columns[f.name]
+
+        missing = []
+        if isinstance(values, list) and MISSING in values:
+            missing = [i for i, v in enumerate(values) if v is MISSING]
+            for i in missing:
+                values[i] = None
+
+        columns[f.name], invalid = _convert_column(values, f)
+
+        if missing:
+            failures.append(('%s: missing' % f.name, _mask(length, missing)))
+        if invalid:
+            failures.append(('%s: expected %s' % (f.name, f.type), _mask(length, invalid)))
+        if f.name in required and columns[f.name].null_count > len(missing) + len(invalid):
+            flagged = pc.invert(_mask(length, missing + invalid))
+            failures.append(('%s: required' % f.name, pc.or_(pc.is_valid(columns[f.name]), flagged)))
+
+    valid = pa.array([True] * length, pa.bool_())
+    for _, mask in failures:
+        valid = pc.and_(valid, mask)
+
+    errors = {}
+    for i in pc.indices_nonzero(pc.invert(valid)).to_pylist():
+        errors[i] = [message for message, mask in failures if not mask[i].as_py()]
+
+    return columns, valid, errors
+
+def quarantine(raw, errors, dataset):
+    """Quarantine Records
+
+    Collect the records rejected by validate, with their errors, into
+    a table for the quarantine tier.
+
+    Args:
+        raw: list of raw records, or a raw tier pyarrow RecordBatch
+        errors: dict of error messages by invalid record index
+        dataset: dataset name of the records
+    """
+    if isinstance(raw, pa.RecordBatch):
+        records = raw.take(pa.array(list(errors), pa.int64())).to_pylist()
+    else:
+        records = [raw[i] for i in errors]
+
+    return pa.Table.from_pydict({
+        'dataset': [dataset] * len(errors),
+        'record': [json.dumps(record, default=str) for record in records],
+        'errors': [errors[i] for i in errors],
+    }, schema=SCHEMA_QUARANTINE)
@@ -0,0 +1,50 @@
+from standardizer.clients import Client_Cache, credential_expiry
+from standardizer import clients
+
+import datetime
+
+class Credentials:
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+def test_credential_expiry():
+    at = datetime.datetime(2030, 1, 1, tzinfo=datetime.timezone.utc)
+
+    assert credential_expiry(Credentials(expires_on=1893456000)) == 1893456000
+    assert credential_expiry(Credentials(expiry=at.replace(tzinfo=None))) == at.timestamp()
+    assert credential_expiry(Credentials(_expiry_time=at)) == at.timestamp()
+    assert credential_expiry(Credentials(access_key='static')) is None
+    assert credential_expiry(None) is None
+
+def test_client_is_rebuilt_before_its_credentials_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(clients.time, 'time', lambda: now[0])
+
+    built = []
+    def factory():
+        built.append(Credentials(expires_on=now[0] + 600))
+        return built[-1]
+
+    cache = Client_Cache(ttl=3600, margin=60)
+    client = cache.get('key', factory, credential_expiry)
+    assert cache.get('key', factory, credential_expiry) is client
+
+    now[0] += 539
+    assert cache.get('key', factory, credential_expiry) is client
+
+    now[0] += 1
+    assert cache.get('key', factory, credential_expiry) is not client
+    assert len(built) == 2
+
+def test_client_without_expiry_lives_for_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(clients.time, 'time', lambda: now[0])
+
+    cache = Client_Cache(ttl=3600, margin=60)
+    client = cache.get('key', object, lambda c: None)
+
+    now[0] += 3539
+    assert cache.get('key', object) is client
+
+    now[0] += 1
+    assert cache.get('key', object) is not client
@@ -0,0 +1,37 @@
+from standardizer.validation import parse_timestamp, validate
+from standardizer.schema import SCHEMA_LOG_META
+
+import pyarrow as pa
+import datetime
+import pytest
+
+def test_parse_timestamp():
+    parsed = parse_timestamp(pa.array(['2023-01-01T10:00:00.123456', '2023-01-01T10:00:00.5', None]), pa.timestamp('ms'))
+
+    assert parsed.to_pylist() == [
+        datetime.datetime(2023, 1, 1, 10, 0, 0, 123000),
+        datetime.datetime(2023, 1, 1, 10, 0, 0, 500000),
+        None,
+    ]
+
+@pytest.mark.parametrize('value', [
+    '2023-01-01',
+    '2023-01-01 10:00',
+    '2023-01-01T10:00',
+    '2023-01-01T10:00:00',
+    '2023-01-01 10:00:00.123456',
+    '2023-01-01T10:00:00.123456Z',
+    '2023-01-01T10:00:00.1234567',
+])
+def test_parse_timestamp_rejects_other_formats(value):
+    with pytest.raises(ValueError):
+        parse_timestamp(pa.array(['2023-01-01T10:00:00.123456', value]), pa.timestamp('ms'))
+
+def test_validate_flags_only_the_malformed_timestamp():
+    log = {'etl_id': 'e', 'msg_id': 'm', 'level': 'INFO', 'name': 'lib.server.game', 'log_message': 'Attack Completed'}
+    raw = [dict(log, timestamp='2023-01-01T10:00:00.123456'), dict(log, timestamp='2023-01-01 10:00')]
+
+    columns, valid, errors = validate(raw, SCHEMA_LOG_META)
+
+    assert valid.to_pylist() == [True, False]
+    assert errors == {1: ['timestamp: expected timestamp[ms]']}